@@ -1,34 +1,40 @@
-import os, json, re, stripe, bleach, requests
-from datetime import datetime, date, timedelta
+import os, json, re, stripe, bleach
+from datetime import datetime, date, timedelta, timezone
 from urllib.parse import urlencode
-from flask import Flask, render_template, request, redirect, url_for, flash, abort, jsonify, session, send_from_directory
+from flask import Flask, render_template, request, redirect, url_for, flash, abort, jsonify, session, send_from_directory, send_file
 from markupsafe import Markup
 from flask_wtf import FlaskForm
 from flask_wtf.file import FileField, FileAllowed
 from wtforms import StringField, TextAreaField, BooleanField, FloatField
 from wtforms.validators import DataRequired, Email, Optional, URL as URLVal, NumberRange
-from models import db, Post, Subscriber, ContactMessage, Donation, NewsItem
+from models import db, Post, Subscriber, ContactMessage, Donation, NewsItem, CalendarEvent, HeroImage, ensure_schema, pending_schema, backfill_news_link_hashes
 from utils.signal import send_signal_group
 from utils.email import send_email_smtp
-from utils.scraper import fetch_calendar_week
 from pathlib import Path
 from pathlib import Path as _P
 from dotenv import load_dotenv
 from wtforms.validators import ValidationError
 from werkzeug.utils import secure_filename
 from werkzeug.middleware.proxy_fix import ProxyFix
+from sqlalchemy import insert as sa_insert, func, or_
+from sqlalchemy.orm import load_only
 from itertools import islice
-from utils.scraper import fetch_calendar_week
-from utils.calendar_rss import week_events_rss
-from utils.rss_merge import fetch_combined
+from utils.scraper import fetch_calendar_weeks
+from utils.calendar_rss import week_events_rss, feed_events, prefetch as prefetch_calendar, cache_info as calendar_cache_info
+from utils.feed_fetch import configure as configure_feed_fetch, circuit_state
+from utils import feed_stats, http_client, event_feeds, page_cache, article_render, images, img_proxy
+from utils.feeds import fetch_entries, FeedEntry, link_key
+from utils.near_dup import cluster
+from utils.cache import configure as configure_cache
+import utils.cache as feed_cache
+import utils.search as search_index
 from admin.views import admin_bp
 from zoneinfo import ZoneInfo
-from dateutil import parser as dtparse
 from functools import wraps
-import feedparser
+from dataclasses import replace
 import subprocess
-import logging, sys
-import time, urllib.parse
+import logging, sys, threading
+import time, urllib.parse, hashlib
 import secrets
 
 TZ = ZoneInfo("America/Indiana/Indianapolis")
@@ -63,30 +69,87 @@ def inject_keys():
 def inject_cfg():
     return {"CFG": app.config}
 
+@app.context_processor
+def inject_images():
+    # hero_picture(url, size, sizes=..., alt=...) / hero_srcset(url): see utils/images.py
+    return {"hero_picture": images.picture, "hero_srcset": images.srcset}
+
 app.config.from_object(Config)
 app.config.setdefault("HERO_IMAGE_DIR", str(Path(app.static_folder) / "img"))
 app.logger.info("DB URL driver: %s", (app.config["SQLALCHEMY_DATABASE_URI"].split("://",1)[0]))
 Path(app.config["HERO_IMAGE_DIR"]).mkdir(parents=True, exist_ok=True)
+Path(app.instance_path).mkdir(parents=True, exist_ok=True)
+app.config["FEED_STATE_DB"] = app.config.get("FEED_STATE_DB") or str(Path(app.instance_path) / "feed_state.db")
 db.init_app(app)
 with app.app_context():
     db.create_all()
+    # column/index upgrades and backfills run once per deploy from `flask init-db`,
+    # not here in every worker at once
+    pending = pending_schema()
+    if pending:
+        app.logger.warning("database schema is behind (%s): run `flask init-db`", ", ".join(pending))
+    else:
+        search_index.ensure_index(fill=False)  # filled by `flask init-db` / `flask reindex-search`
 
 stripe.api_key = app.config["STRIPE_SECRET_KEY"]
-
-_cache = {"t": 0, "items": []}
+http_client.configure(connect_timeout=app.config["HTTP_CONNECT_TIMEOUT"], read_timeout=app.config["HTTP_READ_TIMEOUT"],
+                      pool_size=app.config["FEED_WORKERS"])
+configure_feed_fetch(timeout=app.config["FEED_TIMEOUT"], deadline=app.config["FEED_DEADLINE"], workers=app.config["FEED_WORKERS"],
+                     state_db=app.config["FEED_STATE_DB"], max_bytes=app.config["FEED_MAX_BYTES"], parser=app.config["FEED_PARSER"],
+                     breaker_failures=app.config["FEED_BREAKER_FAILURES"], breaker_backoff=app.config["FEED_BREAKER_BACKOFF"],
+                     breaker_max_backoff=app.config["FEED_BREAKER_MAX_BACKOFF"])
+feed_stats.configure(db=app.config["FEED_STATE_DB"], window=app.config["FEED_STATS_WINDOW"])
+app.config["CACHE_URL"] = app.config.get("CACHE_URL") or str(Path(app.instance_path) / "cache.db")
+configure_cache(max_stale=app.config["CACHE_MAX_STALE"], backend=app.config["CACHE_BACKEND"], url=app.config["CACHE_URL"],
+                max_entries=app.config["CACHE_MAX_ENTRIES"], max_bytes=app.config["CACHE_MAX_BYTES"])
+page_cache.configure(ttl=app.config["PAGE_CACHE_TTL"], enabled=app.config["PAGE_CACHE"])
+images.configure(app.config["HERO_IMAGE_DIR"], quality=app.config["HERO_IMAGE_QUALITY"], async_=app.config["HERO_VARIANTS_ASYNC"])
+app.config["IMG_PROXY_DIR"] = app.config.get("IMG_PROXY_DIR") or str(Path(app.instance_path) / "img_proxy")
+img_proxy.configure(app.config["SECRET_KEY"], app.config["IMG_PROXY_DIR"], max_bytes=app.config["IMG_PROXY_MAX_BYTES"],
+                    width=app.config["IMG_PROXY_WIDTH"], enabled=app.config["IMG_PROXY"])
+if not images.available():
+    app.logger.info("Pillow not installed: hero images are served as uploaded (no resized variants) "
+                    "and feed card images link to the publisher (no /img-proxy/)")
 
 ALLOWED_TAGS = list(bleach.sanitizer.ALLOWED_TAGS) + ["p","img","video","audio","source","figure","figcaption","h1","h2","h3","h4","h5","h6","blockquote","pre","code","hr","br","strong","em","ul","ol","li","a","table","thead","tbody","tr","th","td","span"]
 ALLOWED_ATTRS = {**bleach.sanitizer.ALLOWED_ATTRIBUTES, "img":["src","alt","title","loading"], "a":["href","title","target","rel"], "video":["src","controls","poster"], "audio":["src","controls"], "source":["src","type"], "span":["class"]}
 ALLOWED_PROTOCOLS = ["http","https","mailto","tel"]
 ALLOWED_IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg"}
 
-def list_static_images():
-    base = Path(app.config["HERO_IMAGE_DIR"])
-    imgs = []
-    for p in base.iterdir():
-        if p.is_file() and p.suffix.lower() in ALLOWED_IMAGE_EXTS:
-            imgs.append("/static/img/" + p.name)
-    return sorted(imgs)
+def hero_choices():
+    # the admin picker, from the image index (no directory scan)
+    return HeroImage.query.order_by(HeroImage.created_at.desc(), HeroImage.id.desc()).all()
+
+def _record_image(path, original_name=None):
+    """Add or refresh the HeroImage index row of a stored file (caller commits)."""
+    info = images.describe(path)
+    row = HeroImage.query.filter_by(key=info["key"]).first() or HeroImage(original_name=original_name)
+    for k, v in info.items():
+        setattr(row, k, v)
+    m = images.manifest(info["url"])
+    if m:
+        row.variants_json = json.dumps(m["variants"])
+    db.session.add(row)
+    return row
+
+def _variants_done(manifest):
+    # background variant worker: note the new variants in the index
+    with app.app_context():
+        HeroImage.query.filter_by(url=manifest["src"]).update({"variants_json": json.dumps(manifest["variants"])})
+        db.session.commit()
+
+def save_hero_upload(file):
+    """Store an uploaded hero by content hash (an identical file is kept once); its URL, or None if not an image."""
+    fn = secure_filename(file.filename or "")
+    ext = os.path.splitext(fn)[1].lower()
+    if not ext or ext not in ALLOWED_IMAGE_EXTS:
+        return None
+    path, created = images.store(file.read(), ext)
+    url = "/static/img/" + path.name
+    if created or not images.manifest(url):
+        images.process(path, on_done=_variants_done)
+    _record_image(path, original_name=fn)
+    return url
 
 def url_or_static(form, field):
     v = (field.data or "").strip()
@@ -118,135 +181,283 @@ def _mask(v: str | None, keep: int = 4) -> str:
     if len(v) <= keep: return v
     return v[:keep] + "…" + v[-keep:]
 
-def _first_image(entry):
-    # 1) media:content / media:thumbnail
-    media = getattr(entry, "media_content", None) or []
-    if media and isinstance(media, list) and media[0].get("url"):
-        return media[0]["url"]
-    thumbs = getattr(entry, "media_thumbnail", None) or []
-    if thumbs and isinstance(thumbs, list) and thumbs[0].get("url"):
-        return thumbs[0]["url"]
-    # 2) enclosure
-    enc = getattr(entry, "enclosures", None) or []
-    for e in enc:
-        if e.get("type", "").startswith("image/") and e.get("href"):
-            return e["href"]
-    # 3) try to sniff from summary/content (very light)
-    for key in ("summary", "summary_detail", "content"):
-        val = getattr(entry, key, None)
-        html = ""
-        if isinstance(val, list) and val:
-            html = val[0].get("value", "")
-        elif isinstance(val, dict):
-            html = val.get("value", "")
-        elif isinstance(val, str):
-            html = val
-        if html:
-            import re
-            m = re.search(r'<img[^>]+src="([^"]+)"', html, re.I)
-            if m:
-                return m.group(1)
-    return None
-
-def _source(entry):
-    # Try to show a human-readable source (falls back to link domain).
-    if getattr(entry, "source", None) and entry.source.get("title"):
-        return entry.source["title"]
-    try:
-        return urllib.parse.urlparse(entry.link).hostname
-    except Exception:
-        return "Source"
-
-def _fmt_time(entry):
-    # Prefer published, then updated
-    raw = getattr(entry, "published", None) or getattr(entry, "updated", None)
-    if not raw:
-        return None
-    try:
-        dt = dtparse.parse(raw)
-        if not dt.tzinfo:
-            dt = dt.replace(tzinfo=TZ)
-        return dt.astimezone(TZ)
-    except Exception:
-        return None
-
 def _rss_urls():
     raw = app.config.get("RSS_FEEDS") or os.getenv("RSS_FEEDS") or ""
     return [u.strip() for u in raw.split(",") if u.strip()]
 
-_multi_cache = {}  # {cache_key: {"t": epoch, "items": [...]}}
-def _get_cache(key, ttl=300):
-    now = time.time()
-    ent = _multi_cache.get(key)
-    if ent and (now - ent["t"] < ttl):
-        return ent["items"]
-    return None
-def _set_cache(key, items):
-    _multi_cache[key] = {"t": time.time(), "items": items}
-
 def _admin_pw():
     return (app.config.get("ADMIN_PASSWORD") or os.getenv("ADMIN_PASSWORD") or "").strip()
 
 def fetch_single_feed(url, limit=30, ttl=300):
-    if not url:
-        return []
-    cache_key = f"single::{url}::{limit}"
-    cached = _get_cache(cache_key, ttl)
-    if cached is not None:
-        return cached
-
-    d = feedparser.parse(url)
-    out = []
-    for e in d.entries[:limit]:
-        out.append({
-            "title": e.title,
-            "link": e.link,
-            "img": _first_image(e),
-            "when": _fmt_time(e),
-            "source": _source(e),
-            "summary": _excerpt(getattr(e, "summary", None), max_chars=280),  # ← trim here
-        })
-    # sort newest first if we have dates
-    out.sort(key=lambda x: x["when"] or datetime.min.replace(tzinfo=TZ), reverse=True)
-    _set_cache(cache_key, out)
-    return out
+    return fetch_entries([url], per_feed_limit=limit, limit=limit, ttl=ttl)
 
 def fetch_multi_feeds(urls, per_feed_limit=20, total_limit=40, ttl=300):
-    if not urls:
-        return []
-    cache_key = f"multi::{','.join(urls)}::{per_feed_limit}::{total_limit}"
-    cached = _get_cache(cache_key, ttl)
-    if cached is not None:
-        return cached
-
-    items = []
-    seen_links = set()
-    for u in urls:
+    return fetch_entries(urls, per_feed_limit=per_feed_limit, limit=total_limit, ttl=ttl)
+
+def _live_section(section, total_limit=40, ttl=300):
+    if section == "crime":
+        # Crime (multi if provided, else single)
+        crime_urls = app.config.get("CRIME_FEED_URLS") or []
+        if crime_urls:
+            return fetch_multi_feeds(crime_urls, per_feed_limit=20, total_limit=total_limit, ttl=ttl)
+        return fetch_single_feed(app.config.get("CRIME_FEED_URL"), limit=min(total_limit, 30), ttl=ttl)
+    return fetch_multi_feeds(app.config.get("NEWS_FEED_URLS") or [], per_feed_limit=20, total_limit=total_limit, ttl=ttl)
+
+def _utc_naive(dt):
+    if dt and dt.tzinfo:
+        return dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+def _insert_ignore(model, rows, *keys):
+    # INSERT ... ON CONFLICT (keys) DO NOTHING; returns rows inserted
+    dialect = db.engine.dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect in ("postgresql", "cockroachdb"):
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        db.session.execute(sa_insert(model), rows)
+        return len(rows)
+    res = db.session.execute(insert(model).values(rows).on_conflict_do_nothing(index_elements=list(keys)))
+    return max(res.rowcount, 0)
+
+def _store_news_items(items, section=None):
+    """
+    Insert the FeedEntry items not stored yet: for a feed section, the links
+    that section doesn't have (a story in both feeds gets a row in each);
+    for a manual import (no section), the links not stored at all.
+    Returns (inserted, skipped).
+    """
+    rows, skipped = {}, 0
+    for it in items:
+        if not it.title or not it.link or it.key in rows:
+            skipped += 1
+            continue
+        rows[it.key] = dict(
+            title=it.title[:300],
+            link=it.link[:500],
+            link_hash=it.key,
+            source=(it.source or "")[:200] or None,
+            summary=it.summary,
+            published_at=_utc_naive(it.when),
+            section=section,
+            image_url=(it.img or "")[:500] or None,
+            seen=False,
+        )
+
+    stored = {}  # {link_hash: {sections it is stored under}}
+    for batch in _chunks(rows, 200):
+        for h, sec in db.session.query(NewsItem.link_hash, NewsItem.section).filter(NewsItem.link_hash.in_(batch)):
+            stored.setdefault(h, set()).add(sec)
+    if section:
+        # manual imports don't carry a section; the first section to list them claims them
+        untagged = [h for h, secs in stored.items() if None in secs and section not in secs]
+        if untagged:
+            NewsItem.query.filter(NewsItem.link_hash.in_(untagged), NewsItem.section.is_(None)) \
+                .update({"section": section}, synchronize_session=False)
+            for h in untagged:
+                stored[h] = (stored[h] - {None}) | {section}
+        new = [r for h, r in rows.items() if section not in stored.get(h, ())]
+    else:
+        new = [r for h, r in rows.items() if h not in stored]
+
+    inserted = 0
+    for batch in _chunks(new, 100):
+        inserted += _insert_ignore(NewsItem, batch, "link_hash", "section")
+        # one search hit per story: a link already stored in another section is indexed already
+        fresh = [r["link_hash"] for r in batch if r["link_hash"] not in stored]
+        if fresh:
+            search_index.index_news(NewsItem.query.filter(NewsItem.link_hash.in_(fresh)))
+    db.session.commit()
+    return inserted, skipped + len(rows) - inserted
+
+def ingest_news():
+    """Pull the crime and general feeds into NewsItem. Returns {section: (inserted, skipped)}."""
+    out = {section: _store_news_items(_live_section(section, total_limit=200, ttl=0), section=section)
+           for section in ("crime", "news")}
+    if any(inserted for inserted, _ in out.values()):
+        page_cache.invalidate("news")
+    return out
+
+_ingest_lock = threading.Lock()
+
+def _kick_news_ingest():
+    # Start a background ingest if the last one (by any worker; the marker
+    # lives in the shared cache) is older than NEWS_INGEST_INTERVAL.
+    # Called from _news_ingest_due() before every request, so it doesn't
+    # depend on /news/ missing the page cache.
+    interval = app.config["NEWS_INGEST_INTERVAL"]
+    if interval <= 0:
+        return
+    last = feed_cache.cache.get("ingest::news::at") or 0
+    if time.time() - last < interval or not _ingest_lock.acquire(blocking=False):
+        return
+    feed_cache.cache.set("ingest::news::at", time.time(), interval * 4)
+
+    def run():
         try:
-            d = feedparser.parse(u)
-            for e in d.entries[:per_feed_limit]:
-                ...
-                items.append({
-                    "title": e.title,
-                    "link": e.link,
-                    "img": _first_image(e),
-                    "when": _fmt_time(e),
-                    "source": _source(e),
-                    "summary": _excerpt(getattr(e, "summary", None), max_chars=280),  # ← trim here
-                })
+            with app.app_context():
+                app.logger.info("news ingest: %s", ingest_news())
         except Exception:
+            app.logger.exception("news ingest failed")
+        finally:
+            _ingest_lock.release()
+
+    threading.Thread(target=run, name="news-ingest", daemon=True).start()
+
+_ingest_check = {"next": 0.0}
+
+@app.before_request
+def _news_ingest_due():
+    # checked at most every 30s per worker; cron can run `flask ingest-news`
+    # instead (NEWS_INGEST_INTERVAL=0 turns this off)
+    now = time.time()
+    if now >= _ingest_check["next"]:
+        _ingest_check["next"] = now + 30
+        _kick_news_ingest()
+
+def _news_rows(section, limit, before=None):
+    q = NewsItem.query.filter_by(section=section)
+    if before:
+        q = q.filter(NewsItem.published_at < before)
+    return q.order_by(NewsItem.published_at.desc().nullslast(), NewsItem.id.desc()).limit(limit).all()
+
+def _news_row_item(r):
+    # same record as the feed engine, so news.html doesn't care where it came from
+    return FeedEntry(
+        title=r.title,
+        link=r.link,
+        key=r.link_hash or link_key(r.link),
+        img=r.image_url,
+        when=r.published_at.replace(tzinfo=timezone.utc).astimezone(TZ) if r.published_at else None,
+        source=r.source,
+        summary=r.summary,
+    )
+
+# --- calendar: feed/scraper -> CalendarEvent ---
+
+_EVENT_FIELDS = ("title", "start", "end", "location", "link", "week_key", "raw_source")
+
+def _event_key(ev):
+    # the event's link (else its title) plus its day: stable across syncs, a
+    # time change updates the row, and a recurring meeting sharing one link
+    # still gets a row per occurrence
+    ident = link_key(ev["url"]) if ev.get("url") else ev["title"].strip().lower()
+    return hashlib.sha1(f"{ident}|{ev['start'].date().isoformat()}".encode("utf-8")).hexdigest()
+
+def _event_row(ev, source):
+    y, w, _ = ev["start"].isocalendar()
+    return dict(
+        uid=_event_key(ev),
+        title=(ev.get("title") or "Untitled")[:400],
+        start=ev["start"],
+        end=ev.get("end"),
+        location=(ev.get("location") or "")[:400] or None,
+        link=(ev.get("url") or "")[:600] or None,
+        week_key=f"{y}-{w:02d}",
+        raw_source=source,
+    )
+
+def _calendar_sources():
+    # (source, events) from the City's RSS feed (every week in it) and the
+    # scraped grid for this week and the next EVENTS_SCRAPE_WEEKS - 1
+    out = [("rss", feed_events())]
+    monday = date.today() - timedelta(days=date.today().weekday())
+    weeks = [(monday + timedelta(weeks=i)).isocalendar()[:2] for i in range(app.config["EVENTS_SCRAPE_WEEKS"])]
+    for (y, w), events in fetch_calendar_weeks(weeks).items():
+        if isinstance(events, Exception):
+            app.logger.warning("calendar scrape failed for %s-%02d: %s", y, w, events)
             continue
+        out.append(("calendar.indy.gov", events))
+    return out
 
-    items.sort(key=lambda x: x["when"] or datetime.min.replace(tzinfo=TZ), reverse=True)
-    items = items[:total_limit]
-    _set_cache(cache_key, items)
-    return items
+def sync_events():
+    """Upsert calendar events into CalendarEvent, touching only rows that changed. Returns (inserted, updated, unchanged)."""
+    rows = {}
+    for source, events in _calendar_sources():
+        for ev in events:
+            if ev.get("start"):
+                r = _event_row(ev, source)
+                rows.setdefault(r["uid"], r)  # the feed wins over the scrape
+
+    inserted = updated = 0
+    existing = {}
+    for batch in _chunks(rows, 200):
+        existing.update((e.uid, e) for e in CalendarEvent.query.filter(CalendarEvent.uid.in_(batch)))
+    for uid, r in rows.items():
+        e = existing.get(uid)
+        if e and any(getattr(e, f) != r[f] for f in _EVENT_FIELDS):
+            for f in _EVENT_FIELDS:
+                setattr(e, f, r[f])
+            e.updated_at = datetime.utcnow()
+            updated += 1
+    for batch in _chunks([r for uid, r in rows.items() if uid not in existing], 100):
+        inserted += _insert_ignore(CalendarEvent, batch, "uid")
+
+    # feed rows in the feed's date range that it no longer lists (cancelled,
+    # or stored under an earlier key) would otherwise stay on the week pages
+    feed = [r for r in rows.values() if r["raw_source"] == "rss"]
+    if feed:
+        gone = CalendarEvent.query.filter(CalendarEvent.raw_source == "rss",
+                                          CalendarEvent.start >= min(r["start"] for r in feed),
+                                          CalendarEvent.uid.notin_([r["uid"] for r in feed])) \
+            .delete(synchronize_session=False)
+        if gone:
+            app.logger.info("events sync: removed %d feed events no longer listed", gone)
+    db.session.commit()
+    return inserted, updated, len(rows) - inserted - updated
+
+_events_lock = threading.Lock()
+
+def _kick_events_sync():
+    # Same scheme as _kick_news_ingest: at most one sync per EVENTS_SYNC_INTERVAL across workers.
+    interval = app.config["EVENTS_SYNC_INTERVAL"]
+    if interval <= 0:
+        return
+    last = feed_cache.cache.get("sync::events::at") or 0
+    if time.time() - last < interval or not _events_lock.acquire(blocking=False):
+        return
+    feed_cache.cache.set("sync::events::at", time.time(), interval * 4)
+
+    def run():
+        try:
+            with app.app_context():
+                app.logger.info("events sync: %s", sync_events())
+        except Exception:
+            app.logger.exception("events sync failed")
+        finally:
+            _events_lock.release()
+
+    threading.Thread(target=run, name="events-sync", daemon=True).start()
+
+def _event_item(r):
+    # the shape events.html was written against (week_events_rss items)
+    return {"uid": r.uid, "title": r.title, "start": r.start, "end": r.end, "location": r.location, "url": r.link}
+
+def _week_items(iso_year, iso_week):
+    rows = CalendarEvent.query.filter_by(week_key=f"{iso_year}-{iso_week:02d}").order_by(CalendarEvent.start).all()
+    if rows or db.session.query(CalendarEvent.id).first():
+        return [_event_item(r) for r in rows]
+    # nothing synced yet (fresh install): fall back to the live feed
+    items, _, _ = week_events_rss(iso_year, iso_week)
+    prefetch_calendar()  # keep prev/next clicks off the upstream feed
+    return [{**ev, "uid": _event_key(ev)} for ev in items]
+
+def _week_version(week_key):
+    """(version, last change) of one week's CalendarEvent rows; (None, None) before the first sync."""
+    n, created, updated = db.session.query(
+        func.count(CalendarEvent.id), func.max(CalendarEvent.created_at), func.max(CalendarEvent.updated_at)
+    ).filter(CalendarEvent.week_key == week_key).one()
+    if not n and not db.session.query(CalendarEvent.id).first():
+        return None, None
+    changed = max(d for d in (created, updated, datetime(2000, 1, 1)) if d)
+    return f"{n}:{created}:{updated}", changed
 
 def get_news_items(ttl=600, limit=40):
     urls = _rss_urls()
     if not urls:
         return []
-    return fetch_combined(urls, limit=limit, ttl=ttl)
+    return fetch_entries(urls, per_feed_limit=100, limit=limit, ttl=ttl)
 
 def _normalize(v: str) -> str:
     v = (v or "").strip()
@@ -326,21 +537,6 @@ def get_app_version(ttl=0):
         _ver_state["src"] = "fallback"
         return _ver_state["v"]
     
-def _excerpt(html: str | None, max_chars: int = 280) -> str | None:
-    if not html:
-        return None
-    # strip all tags -> plain text
-    txt = bleach.clean(html, tags=[], attributes={}, protocols=[], strip=True)
-    # collapse whitespace
-    txt = re.sub(r"\s+", " ", txt).strip()
-    # cap length with a word-boundary ellipsis
-    if len(txt) > max_chars:
-        cut = txt[:max_chars].rstrip()
-        # try not to cut mid-word
-        cut = cut.rsplit(" ", 1)[0] if " " in cut else cut
-        txt = cut + "…"
-    return txt or None
-
 @app.context_processor
 def inject_version():
     # template expects the 'v' prefix, so we add it there
@@ -384,6 +580,21 @@ def sanitize_html(html): return bleach.clean(html or "", tags=ALLOWED_TAGS, attr
 def require_admin(): 
     if not session.get("is_admin"): abort(403)
 
+def _derive_post(p):
+    # rendered body, excerpt, reading time and TOC, so the public pages do no HTML work
+    for k, v in article_render.derive(p.content, app.static_folder).items():
+        setattr(p, k, v)
+
+def _post_pages(p):
+    """Page-cache tags of the public pages that show post p as it is now."""
+    if not p or not p.published:
+        return set()
+    tags = {"articles", f"post:{p.slug}"}
+    latest = Post.query.with_entities(Post.id).filter_by(published=True).order_by(Post.created_at.desc()).limit(3)
+    if p.id in {pid for (pid,) in latest}:
+        tags.add("home")
+    return tags
+
 # Optional: decorator if you need to protect any non-/admin route later
 def login_required(f):
     @wraps(f)
@@ -411,25 +622,57 @@ def favicon_file():
     return send_from_directory(app.static_folder, 'favicon.ico')
 
 @app.route("/")
+@page_cache.cached_page(lambda: ["home"])
 def index():
     intro = ("NewsNowIndy is a local, independent investigative journalism outlet in Indianapolis. "
              "We focus on accountability reporting across criminal justice, crime, and local government—"
              "digging into court records, budgets, policing, prosecutions, and public policy so residents "
              "can make informed decisions. Our mission is simple: verify the facts, follow the paper trail, "
              "and tell the story plainly.")
-    posts = Post.query.filter_by(published=True).order_by(Post.created_at.desc()).limit(3).all()
+    posts = Post.query.options(load_only(Post.id, Post.title, Post.slug, Post.created_at, Post.hero_image_url,
+                                         Post.summary, Post.excerpt, Post.reading_minutes)) \
+        .filter_by(published=True).order_by(Post.created_at.desc()).limit(3).all()
     return render_template("index.html", intro=intro, posts=posts)
 
+def _article_cursor(v):
+    # "<created_at iso>_<id>" of the last post on the previous page
+    at, _, pid = (v or "").rpartition("_")
+    try:
+        return datetime.fromisoformat(at), int(pid)
+    except ValueError:
+        return None
+
 @app.route("/articles/")
+@page_cache.cached_page(lambda: ["articles"], args=("before",))
 def articles():
-    posts = Post.query.filter_by(published=True).order_by(Post.created_at.desc()).all()
-    return render_template("articles.html", posts=posts)
+    size = app.config["ARTICLES_PAGE_SIZE"]
+    cursor = _article_cursor(request.args.get("before", ""))
+    q = Post.query.options(load_only(Post.id, Post.title, Post.slug, Post.created_at, Post.hero_image_url,
+                                     Post.reading_minutes)) \
+        .filter_by(published=True)
+    if cursor:
+        at, pid = cursor
+        # the plain created_at bound lets the (published, created_at) index seek to the page
+        q = q.filter(Post.created_at <= at, or_(Post.created_at < at, Post.id < pid))
+    posts = q.order_by(Post.created_at.desc(), Post.id.desc()).limit(size + 1).all()
+    older = f"{posts[size - 1].created_at.isoformat()}_{posts[size - 1].id}" if len(posts) > size else None
+    return render_template("articles.html", posts=posts[:size], older=older, paged=bool(cursor))
 
 @app.route("/article/<slug>/")
+@page_cache.cached_page(lambda slug: [f"post:{slug}"])
 def article_detail(slug):
     post = Post.query.filter_by(slug=slug, published=True).first_or_404()
     return render_template("article_detail.html", post=post)
 
+@app.route("/search/")
+def search():
+    q = (request.args.get("q") or "").strip()[:200]
+    page = request.args.get("page", 1, type=int)
+    page = min(max(page, 1), 50)
+    hits, more = search_index.search(q, page, app.config["SEARCH_PAGE_SIZE"]) if q else ([], False)
+    results = [("post", h) if isinstance(h, Post) else ("news", h) for h in hits]
+    return render_template("search.html", q=q, results=results, page=page, more=more)
+
 @app.route("/subscribe/", methods=["GET","POST"])
 def subscribe():
     form = SubscribeForm()
@@ -502,7 +745,7 @@ def contact():
         secret = app.config.get("TURNSTILE_SECRET"); token = request.form.get("cf-turnstile-response",""); is_spam = False
         if secret and token:
             try:
-                ok = requests.post("https://challenges.cloudflare.com/turnstile/v0/siteverify", data={"secret":secret,"response":token}, timeout=10).json().get("success", False)
+                ok = http_client.post("https://challenges.cloudflare.com/turnstile/v0/siteverify", data={"secret":secret,"response":token}, timeout=10).json().get("success", False)
                 if not ok: is_spam = True
             except Exception: is_spam = True
 
@@ -532,19 +775,49 @@ def contact():
     return render_template("contact.html", form=form, turnstile_site_key=site_key)
 
 @app.route("/news/")
+@page_cache.cached_page(lambda: ["news"], ttl=app.config["NEWS_PAGE_CACHE_TTL"], args=("before",))
 def news():
-    # Crime (multi if provided, else single)
-    crime_urls = app.config.get("CRIME_FEED_URLS") or []
-    if crime_urls:
-        crime = fetch_multi_feeds(crime_urls, per_feed_limit=20, total_limit=40, ttl=300)
-    else:
-        crime = fetch_single_feed(app.config.get("CRIME_FEED_URL"), limit=30, ttl=300)
-
-    # News (already multiple)
-    mixed_urls = app.config.get("NEWS_FEED_URLS") or []
-    mixed = fetch_multi_feeds(mixed_urls, per_feed_limit=20, total_limit=40, ttl=300)
-
-    return render_template("news.html", crime_items=crime, mixed_items=mixed)
+    size = app.config["NEWS_PAGE_SIZE"]
+    try:
+        before = datetime.fromisoformat(request.args.get("before", ""))
+    except ValueError:
+        before = None
+
+    crime_rows = _news_rows("crime", size, before)
+    mixed_rows = _news_rows("news", size, before)
+    crime = [_news_row_item(r) for r in crime_rows]
+    mixed = [_news_row_item(r) for r in mixed_rows]
+
+    # nothing ingested yet (fresh install): fall back to the live feeds
+    if not before:
+        crime = crime or _live_section("crime")
+        mixed = mixed or _live_section("news")
+
+    # "older" cursor: the later of the two oldest cards, so neither column skips items
+    tails = [rows[-1].published_at for rows in (crime_rows, mixed_rows) if len(rows) == size and rows[-1].published_at]
+    older = max(tails).isoformat() if tails else None
+
+    # one card per story, listing every outlet that ran it
+    threshold = app.config["NEWS_DUP_THRESHOLD"]
+    crime, mixed = cluster(crime, threshold), cluster(mixed, threshold)
+    crime, mixed = _proxy_images(crime), _proxy_images(mixed)
+
+    return render_template("news.html", crime_items=crime, mixed_items=mixed, older=older)
+
+def _proxy_images(items):
+    # card images through /img-proxy/ (small, cached here) instead of hotlinking full-size originals
+    base = request.script_root + "/img-proxy/"
+    return [replace(it, img=img_proxy.proxied(it.img, base)) if it.img else it for it in items]
+
+@app.route("/img-proxy/<key>")
+def proxied_image(key):
+    try:
+        path, mime = img_proxy.get(key)
+    except img_proxy.ProxyError as e:
+        return abort(e.status)
+    resp = send_file(path, mimetype=mime, etag=path.stem, conditional=True)
+    resp.headers["Cache-Control"] = "public, max-age=31536000, immutable"  # the key names one image forever
+    return resp
 
 @app.route("/admin/debug-news")
 def admin_debug_news():
@@ -556,18 +829,34 @@ def admin_debug_news():
 
     crime = fetch_single_feed(crime_url, limit=10, ttl=0) if crime_url else []
     mixed = fetch_multi_feeds(mixed_urls, per_feed_limit=10, total_limit=20, ttl=0) if mixed_urls else []
+    stats = feed_cache.cache.stats() if hasattr(feed_cache.cache, "stats") else {}
 
     return (
         "<pre>"
         f"CRIME_FEED_URL: {crime_url or '(empty)'}\n"
         f"NEWS_FEED_URLS: {mixed_urls or '(empty)'}\n"
+        f"Cache: {type(feed_cache.cache).__name__} {stats or ''}\n"
+        f"Image proxy: {img_proxy.cache_info()}\n"
         f"Crime items: {len(crime)}\n"
-        + "\n".join(f"  - {i['when']} | {i['title'][:80]}" for i in crime[:5])
+        + "\n".join(f"  - {i.when} | {i.title[:80]}" for i in crime[:5])
         + "\n\nMixed items: {0}\n".format(len(mixed))
-        + "\n".join(f"  - {i['when']} | {i['source']} | {i['title'][:80]}" for i in mixed[:10])
+        + "\n".join(f"  - {i.when} | {i.source} | {i.title[:80]}" for i in mixed[:10])
         + "</pre>"
     )
 
+@app.route("/admin/feeds/")
+def admin_feeds():
+    if not session.get("is_admin"): return abort(403)
+    groups = [
+        ("Crime", app.config.get("CRIME_FEED_URLS") or [u for u in [app.config.get("CRIME_FEED_URL")] if u]),
+        ("News", app.config.get("NEWS_FEED_URLS") or []),
+        ("RSS import", _rss_urls()),
+    ]
+    groups = [(name, [(u, feed_stats.summary(u), circuit_state(u)) for u in urls]) for name, urls in groups]
+    failing = [(u, s) for _name, feeds in groups for u, s, _c in feeds if s and s["failing"]]
+    return render_template("admin/feeds.html", groups=groups, failing=failing, window=feed_stats.WINDOW,
+                           now=time.time())
+
 @app.route("/events/")
 def events():
     week_param = request.args.get("week","")
@@ -577,20 +866,19 @@ def events():
     if re.fullmatch(r"\d{4}-\d{2}", (week_param or "")):
         iso_year, iso_week = map(int, week_param.split("-"))
 
-    items, start_d, end_d = week_events_rss(iso_year, iso_week)
+    _kick_events_sync()
+    start_d = date.fromisocalendar(iso_year, iso_week, 1)
+    end_d = start_d + timedelta(days=6)
+    items = _week_items(iso_year, iso_week)
 
     # Prev/next week keys
-    start = date.fromisocalendar(iso_year, iso_week, 1)
-    prev_w = (start - timedelta(days=7)).isocalendar()
-    next_w = (start + timedelta(days=7)).isocalendar()
+    prev_w = (start_d - timedelta(days=7)).isocalendar()
+    next_w = (start_d + timedelta(days=7)).isocalendar()
     prev_week = f"{prev_w[0]}-{prev_w[1]:02d}"
     next_week = f"{next_w[0]}-{next_w[1]:02d}"
 
     # Header like "September 21, 2025 – September 27, 2025"
-    if start_d and end_d:
-        pretty_range = f"{start_d.strftime('%B %d, %Y')} – {end_d.strftime('%B %d, %Y')}"
-    else:
-        pretty_range = f"Week {iso_year}-{iso_week:02d}"
+    pretty_range = f"{start_d.strftime('%B %d, %Y')} – {end_d.strftime('%B %d, %Y')}"
 
     return render_template("events.html",
         iso_year=iso_year, iso_week=iso_week,
@@ -598,6 +886,37 @@ def events():
         pretty_range=pretty_range
     )
 
+@app.route("/events/<week>.<fmt>")
+def events_feed(week, fmt):
+    # Calendar-app feeds: built once per change of the week's rows, then
+    # served from the shared cache with a strong ETag (polls get a 304).
+    if fmt not in ("ics", "json") or not re.fullmatch(r"\d{4}-\d{2}", week):
+        return abort(404)
+    iso_year, iso_week = map(int, week.split("-"))
+    try:
+        start_d = date.fromisocalendar(iso_year, iso_week, 1)
+    except ValueError:
+        return abort(404)
+
+    version, changed = _week_version(week)
+    key = f"events::{fmt}::{week}::{version}"
+    ent = feed_cache.cache.get(key) if version else None
+    if ent is None:
+        items = _week_items(iso_year, iso_week)
+        end_d = start_d + timedelta(days=6)
+        if fmt == "ics":
+            body = event_feeds.to_ics(items, f"NewsNowIndy events {week}", stamp=changed and changed.replace(tzinfo=timezone.utc))
+        else:
+            body = event_feeds.to_json(items, week, start_d, end_d)
+        ent = {"etag": hashlib.sha1(body).hexdigest(), "body": body}
+        if version:
+            feed_cache.cache.set(key, ent, 7 * 86400)
+
+    resp = app.response_class(ent["body"], mimetype="text/calendar" if fmt == "ics" else "application/json")
+    resp.set_etag(ent["etag"])
+    resp.headers["Cache-Control"] = "public, max-age=300"
+    return resp.make_conditional(request)
+
 @app.route("/admin/debug-events")
 def admin_debug_events():
     if not session.get("is_admin"): return abort(403)
@@ -605,9 +924,13 @@ def admin_debug_events():
     from utils.calendar_rss import _week_bounds
     iso_year, iso_week, _ = date.today().isocalendar()
     items, start_d, end_d = week_events_rss(iso_year, iso_week)
+    info = calendar_cache_info()
     return (
         "<pre>"
         f"RSS URL: {url or '(empty)'}\n"
+        f"Cache: age {info['age']}s, {info['weeks']} weeks / {info['events']} events indexed\n"
+        f"Lookups: {info['lookups']}, hit rate {info['hit_rate']}, "
+        f"feed loads {info['loads']}, prefetches {info['prefetches']} (this worker)\n"
         f"Week: {iso_year}-{iso_week:02d} ({start_d} .. {end_d})\n"
         f"Items this week: {len(items)}\n"
         + "\n".join(f"- {i['start']}  {i['title']}" for i in items[:10])
@@ -685,14 +1008,10 @@ def admin_posts():
         # 1) If a file was uploaded, save it
         hero = None
         if form.hero_file.data:
-            fn = secure_filename(form.hero_file.data.filename or "")
-            ext = os.path.splitext(fn)[1].lower()
-            if not ext or ext not in ALLOWED_IMAGE_EXTS:
+            hero = save_hero_upload(form.hero_file.data)
+            if not hero:
                 flash("Invalid image type.", "danger")
                 return redirect(url_for("admin_posts"))
-            dest = Path(app.config["HERO_IMAGE_DIR"]) / f"{int(datetime.utcnow().timestamp())}_{fn}"
-            form.hero_file.data.save(dest)
-            hero = "/static/img/" + dest.name
 
         # 2) If no file, use selection or typed URL
         if not hero:
@@ -706,21 +1025,26 @@ def admin_posts():
                     typed = "/" + typed
                 hero = typed or None
 
-        db.session.add(Post(
+        p = Post(
             title=form.title.data,
             slug=form.slug.data,
             summary=form.summary.data or None,
             content=sanitize_html(form.content.data),
             hero_image_url=hero,
             published=form.published.data
-        ))
+        )
+        _derive_post(p)
+        db.session.add(p)
+        db.session.flush()
+        search_index.index_posts([p])
         db.session.commit()
+        page_cache.invalidate(*_post_pages(p))
         flash("Post saved.", "success")
         return redirect(url_for("admin_posts"))
 
     posts = Post.query.order_by(Post.created_at.desc()).all()
     broadcast_form = EmptyForm()
-    return render_template("admin/posts.html", form=form, posts=posts, broadcast_form=broadcast_form, available_images=list_static_images())
+    return render_template("admin/posts.html", form=form, posts=posts, broadcast_form=broadcast_form, available_images=hero_choices())
 
 @app.route("/admin/posts/<int:pid>/edit/", methods=["GET", "POST"])
 def admin_post_edit(pid):
@@ -734,14 +1058,10 @@ def admin_post_edit(pid):
         # Save new upload if provided
         hero = p.hero_image_url
         if form.hero_file.data:
-            fn = secure_filename(form.hero_file.data.filename or "")
-            ext = os.path.splitext(fn)[1].lower()
-            if not ext or ext not in ALLOWED_IMAGE_EXTS:
+            hero = save_hero_upload(form.hero_file.data)
+            if not hero:
                 flash("Invalid image type.", "danger")
                 return redirect(url_for("admin_post_edit", pid=p.id))
-            dest = Path(app.config["HERO_IMAGE_DIR"]) / f"{int(datetime.utcnow().timestamp())}_{fn}"
-            form.hero_file.data.save(dest)
-            hero = "/static/img/" + dest.name
         else:
             choice = (request.form.get("hero_image_choice") or "").strip()
             if choice:
@@ -752,23 +1072,29 @@ def admin_post_edit(pid):
                     typed = "/" + typed
                 hero = typed or None
 
+        shown = _post_pages(p)  # pages showing it before the edit (old slug, home slot)
         p.title = form.title.data
         p.slug = form.slug.data
         p.summary = form.summary.data or None
         p.hero_image_url = hero
         p.content = sanitize_html(form.content.data)
         p.published = form.published.data
+        _derive_post(p)
+        search_index.index_posts([p])
 
         db.session.commit()
+        page_cache.invalidate(*(shown | _post_pages(p)))
         flash("Post updated.", "success")
         return redirect(url_for("admin_posts"))
 
-    return render_template("admin/edit_post.html", form=form, post=p, available_images=list_static_images())
+    return render_template("admin/edit_post.html", form=form, post=p, available_images=hero_choices())
 
 @app.route("/admin/posts/<int:pid>/delete/", methods=["POST"])
 def admin_post_delete(pid):
     if not session.get("is_admin"): return abort(403)
-    p = Post.query.get_or_404(pid); db.session.delete(p); db.session.commit(); flash("Post deleted.", "success"); return redirect(url_for("admin_posts"))
+    p = Post.query.get_or_404(pid); shown = _post_pages(p)
+    search_index.remove_post(p.id); db.session.delete(p); db.session.commit(); page_cache.invalidate(*shown)
+    flash("Post deleted.", "success"); return redirect(url_for("admin_posts"))
 
 @app.route("/admin/posts/<int:pid>/broadcast/", methods=["POST"])
 def admin_post_broadcast(pid):
@@ -908,25 +1234,9 @@ def admin_import_rss():
             flash("No RSS_FEEDS configured.", "warning")
             return redirect(url_for("admin_news"))
 
-        merged = fetch_combined(urls, limit=500, ttl=0)  # bypass cache for import
-        imported = 0
-        for it in merged:
-            title = (it.get("title") or "").strip()
-            link  = (it.get("link") or "").strip()
-            if not title or not link: 
-                continue
-            if NewsItem.query.filter_by(link=link).first():
-                continue
-            db.session.add(NewsItem(
-                title=title[:300],
-                link=link[:500],
-                source=(it.get("source") or "")[:200] or None,
-                summary=it.get("summary") or None,
-                published_at=it.get("when")
-            ))
-            imported += 1
-        db.session.commit()
-        flash(f"RSS import complete. {imported} new items.", "success")
+        merged = fetch_entries(urls, per_feed_limit=100, limit=500, ttl=0)  # bypass cache for import
+        imported, skipped = _store_news_items(merged)
+        flash(f"RSS import complete. {imported} new items, {skipped} skipped.", "success")
     except Exception as e:
         flash(f"RSS import failed: {e}", "danger")
     return redirect(url_for("admin_news"))
@@ -977,8 +1287,93 @@ def admin_debug_signal():
 
 @app.cli.command("init-db")
 def init_db():
+    # create missing tables, then upgrade existing ones; run on every deploy, before the workers start
+    with app.app_context():
+        db.create_all()
+        changed = ensure_schema()
+        backfill_news_link_hashes()
+        search_index.ensure_index()
+        print(f"Database initialized{': added ' + ', '.join(changed) if changed else ''}.")
+
+@app.cli.command("sync-events")
+def sync_events_cmd():
+    # for cron: pull the calendar feed and scraped weeks into CalendarEvent once
+    with app.app_context():
+        print(f"Events sync (inserted, updated, unchanged): {sync_events()}")
+
+@app.cli.command("ingest-news")
+def ingest_news_cmd():
+    # for cron: pull every configured feed into NewsItem once
+    with app.app_context():
+        print(f"News ingest: {ingest_news()}")
+
+@app.cli.command("derive-posts")
+def derive_posts_cmd():
+    # backfill the save-time fields for posts stored before them (or by an older renderer)
+    with app.app_context():
+        n, last = 0, 0
+        while True:
+            batch = Post.query.filter(Post.id > last, or_(Post.derived_version.is_(None),
+                                                          Post.derived_version < article_render.VERSION)) \
+                .order_by(Post.id).limit(50).all()
+            if not batch:
+                break
+            tags = set()
+            for p in batch:
+                _derive_post(p)
+                tags |= _post_pages(p)
+            db.session.commit()
+            page_cache.invalidate(*tags)
+            n, last = n + len(batch), batch[-1].id
+        print(f"Derived fields updated for {n} posts.")
+
+@app.cli.command("make-variants")
+def make_variants_cmd():
+    # resized hero variants for indexed images that don't have them yet
+    if not images.available():
+        print("Pillow is not installed."); return
+    with app.app_context():
+        n = 0
+        for row in hero_choices():
+            path = Path(app.config["HERO_IMAGE_DIR"]) / row.url.rsplit("/", 1)[1]
+            if not images.manifest(row.url) and images.make_variants(path):
+                _record_image(path)
+                n += 1
+        db.session.commit()
+        print(f"Variants written for {n} images.")
+
+@app.cli.command("migrate-images")
+def migrate_images_cmd():
+    # one-time: copy heroes saved as <timestamp>_<name> into the content-addressed
+    # store, index them and point Post.hero_image_url at the stored copy. The old
+    # files stay put (article bodies or outside links may still use them).
+    with app.app_context():
+        base, moved = Path(app.config["HERO_IMAGE_DIR"]), {}
+        for f in sorted(base.iterdir()):
+            if not f.is_file() or f.suffix.lower() not in ALLOWED_IMAGE_EXTS or images.is_stored_name(f.name):
+                continue
+            path, _created = images.store(f.read_bytes(), f.suffix)
+            if not images.manifest("/static/img/" + path.name):
+                images.make_variants(path)
+            _record_image(path, original_name=f.name)
+            moved["/static/img/" + f.name] = "/static/img/" + path.name
+        db.session.flush()
+
+        tags, n = set(), 0
+        for old, new in moved.items():
+            for p in Post.query.filter(Post.hero_image_url.in_([old, old.lstrip("/")])):
+                p.hero_image_url = new
+                tags |= _post_pages(p)
+                n += 1
+        db.session.commit()
+        page_cache.invalidate(*tags)
+        print(f"Indexed {len(moved)} files as {len(set(moved.values()))} stored images; {n} posts repointed.")
+
+@app.cli.command("reindex-search")
+def reindex_search_cmd():
+    # rebuild the search index from Post and NewsItem (after a restore or a bulk SQL edit)
     with app.app_context():
-        db.create_all(); print("Database initialized.")
+        print(f"Search index rebuilt from {search_index.rebuild()} rows.")
 
 if __name__ == "__main__":
     with app.app_context():
@@ -43,6 +43,9 @@ class Config:
     TINYMCE_API_KEY = os.getenv("TINYMCE_API_KEY", "")
 
     INDY_CAL_RSS_URL = os.getenv("INDY_CAL_RSS_URL")
+    # /events/ is served from CalendarEvent; the feed (+ scraped weeks) is synced in the background this often
+    EVENTS_SYNC_INTERVAL = int(os.getenv("EVENTS_SYNC_INTERVAL", "900"))
+    EVENTS_SCRAPE_WEEKS = int(os.getenv("EVENTS_SCRAPE_WEEKS", "2"))  # this week + next; 0 = feed only
 
     FEED_URL = os.getenv("FEED_URL") or (
         "https://rss-bridge.org/bridge01/?action=display&bridge=FeedMergeBridge"
@@ -57,6 +60,62 @@ class Config:
     CRIME_FEED_URL = os.getenv("CRIME_FEED_URL", "")
     NEWS_FEED_URLS  = _split_urls(os.getenv("NEWS_FEED_URLS"))
     CRIME_FEED_URLS = _split_urls(os.getenv("CRIME_FEED_URLS"))
+    # /news/ is served from NewsItem; feeds are ingested in the background this often
+    NEWS_INGEST_INTERVAL = int(os.getenv("NEWS_INGEST_INTERVAL", "300"))
+    NEWS_PAGE_SIZE = int(os.getenv("NEWS_PAGE_SIZE", "40"))
+    # Posts per /articles/ page
+    ARTICLES_PAGE_SIZE = int(os.getenv("ARTICLES_PAGE_SIZE", "25"))
+    # Results per /search/ page
+    SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "20"))
+    # Headline+lead word overlap (Jaccard) at which stories from different outlets share one card; 0 = off
+    NEWS_DUP_THRESHOLD = float(os.getenv("NEWS_DUP_THRESHOLD", "0.4"))
+
+    # Shared outbound HTTP client (utils/http_client.py): default timeouts in seconds
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+
+    # Feed refresh budget: per-feed download limit, overall deadline, pool size
+    FEED_TIMEOUT = float(os.getenv("FEED_TIMEOUT", "6"))
+    FEED_DEADLINE = float(os.getenv("FEED_DEADLINE", "10"))
+    FEED_WORKERS = int(os.getenv("FEED_WORKERS", "8"))
+    # "stream": parse RSS/Atom while downloading, stop at the entry limit; "feedparser": parse whole bodies.
+    # With "stream", a feed stopped early with more than 64 KB left unread has
+    # its connection closed rather than reused (see feed_fetch._drain)
+    FEED_PARSER = os.getenv("FEED_PARSER", "stream")
+    FEED_MAX_BYTES = int(os.getenv("FEED_MAX_BYTES", str(2 * 1024 * 1024)))
+    # sqlite file for feed ETag/Last-Modified validators (defaults to instance/feed_state.db)
+    FEED_STATE_DB = os.getenv("FEED_STATE_DB", "")
+    # Circuit breaker: this many failures in a row skip a feed (a whole host for
+    # timeouts/connection errors) for BACKOFF seconds, doubling up to MAX_BACKOFF
+    FEED_BREAKER_FAILURES = int(os.getenv("FEED_BREAKER_FAILURES", "3"))
+    FEED_BREAKER_BACKOFF = float(os.getenv("FEED_BREAKER_BACKOFF", "30"))
+    FEED_BREAKER_MAX_BACKOFF = float(os.getenv("FEED_BREAKER_MAX_BACKOFF", "1800"))
+    # Fetch samples (timings, bytes, status, errors) kept per feed for /admin/feeds/
+    FEED_STATS_WINDOW = int(os.getenv("FEED_STATS_WINDOW", "100"))
+    # Expired feed caches keep being served (and refreshed in the background) for this long
+    CACHE_MAX_STALE = int(os.getenv("CACHE_MAX_STALE", "1800"))
+    # Feed/page cache: "sqlite" (shared by workers on this host), "redis" (shared
+    # across nodes; needs the redis package) or "memory" (per worker)
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite")
+    CACHE_URL = os.getenv("CACHE_URL", "")  # sqlite path (default instance/cache.db) or redis:// URL
+    # Limits for the "memory" backend (LRU eviction past either one)
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "256"))
+    CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    # Rendered public pages (home, articles, news) served from the cache above;
+    # post saves drop the affected pages right away, the TTL bounds everything else
+    PAGE_CACHE = os.getenv("PAGE_CACHE", "1") == "1"
+    PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", "300"))
+    NEWS_PAGE_CACHE_TTL = int(os.getenv("NEWS_PAGE_CACHE_TTL", "60"))
+    # Hero uploads get thumb/card/full variants in WebP + JPEG/PNG (needs Pillow);
+    # ASYNC=1 makes them on a background worker instead of during the save
+    HERO_IMAGE_QUALITY = int(os.getenv("HERO_IMAGE_QUALITY", "80"))
+    HERO_VARIANTS_ASYNC = os.getenv("HERO_VARIANTS_ASYNC", "0") == "1"
+    # /img-proxy/: feed card images fetched once, shrunk to IMG_PROXY_WIDTH and kept
+    # in IMG_PROXY_DIR (default instance/img_proxy) up to IMG_PROXY_MAX_BYTES
+    IMG_PROXY = os.getenv("IMG_PROXY", "1") == "1"
+    IMG_PROXY_DIR = os.getenv("IMG_PROXY_DIR", "")
+    IMG_PROXY_MAX_BYTES = int(os.getenv("IMG_PROXY_MAX_BYTES", str(256 * 1024 * 1024)))
+    IMG_PROXY_WIDTH = int(os.getenv("IMG_PROXY_WIDTH", "400"))
 
     SQLALCHEMY_DATABASE_URI = os.getenv(
         "DATABASE_URL",
@@ -1,9 +1,16 @@
+import json
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text
+from utils.feeds import link_key
 
 db = SQLAlchemy()
 
 class Post(db.Model):
+    __table_args__ = (
+        # /articles/ pages through "published, newest first" by (created_at, id)
+        db.Index("ix_post_published_created", "published", "created_at"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     slug = db.Column(db.String(200), unique=True, nullable=False)
@@ -13,6 +20,30 @@ class Post(db.Model):
     published = db.Column(db.Boolean, default=True, index=True)
     hero_image_url = db.Column(db.String(500), nullable=True)
     media_json = db.Column(db.Text, nullable=True)
+    # derived from content at save time (utils/article_render.py)
+    body_html = db.Column(db.Text, nullable=True)
+    excerpt = db.Column(db.Text, nullable=True)
+    word_count = db.Column(db.Integer, nullable=True)
+    reading_minutes = db.Column(db.Integer, nullable=True)
+    toc_json = db.Column(db.Text, nullable=True)
+    derived_version = db.Column(db.Integer, nullable=True)
+
+    @property
+    def toc(self):
+        return json.loads(self.toc_json) if self.toc_json else []
+
+class HeroImage(db.Model):
+    # index of the content-addressed hero store (utils/images.py), for the admin picker
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(64), unique=True, index=True, nullable=False)  # sha256 prefix = file stem
+    url = db.Column(db.String(300), unique=True, nullable=False)
+    original_name = db.Column(db.String(255), nullable=True)
+    mime = db.Column(db.String(50), nullable=True)
+    width = db.Column(db.Integer, nullable=True)
+    height = db.Column(db.Integer, nullable=True)
+    bytes = db.Column(db.Integer, nullable=True)
+    variants_json = db.Column(db.Text, nullable=True)  # manifest["variants"], once made
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
 class Subscriber(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -41,16 +72,30 @@ class Donation(db.Model):
     status = db.Column(db.String(50), default="succeeded")
 
 class NewsItem(db.Model):
+    __table_args__ = (
+        # /news/ reads "newest N of a section"
+        db.Index("ix_news_item_section_published", "section", "published_at"),
+        # a story in both the crime and news feeds gets a row in each section
+        db.Index("ix_news_item_link_hash_section", "link_hash", "section", unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(300), nullable=False)
     link = db.Column(db.String(500), nullable=False)
+    link_hash = db.Column(db.String(40), index=True, nullable=True)  # utils.feeds.link_key(link)
     source = db.Column(db.String(200), nullable=True)
-    published_at = db.Column(db.DateTime, index=True, nullable=True)
+    published_at = db.Column(db.DateTime, index=True, nullable=True)  # UTC, naive
     summary = db.Column(db.Text, nullable=True)
     seen = db.Column(db.Boolean, default=False, index=True)
+    section = db.Column(db.String(20), nullable=True)  # "crime" | "news"; NULL for manual imports
+    image_url = db.Column(db.String(500), nullable=True)
 
 class CalendarEvent(db.Model):
+    __table_args__ = (
+        # /events/?week= reads one week in start order
+        db.Index("ix_calendar_event_week_start", "week_key", "start"),
+    )
     id = db.Column(db.Integer, primary_key=True)
+    uid = db.Column(db.String(40), unique=True, index=True, nullable=True)  # sync dedup key, see app._event_key
     title = db.Column(db.String(400), nullable=False)
     start = db.Column(db.DateTime, nullable=True, index=True)
     end = db.Column(db.DateTime, nullable=True)
@@ -59,3 +104,55 @@ class CalendarEvent(db.Model):
     week_key = db.Column(db.String(16), index=True)
     raw_source = db.Column(db.String(50), default="calendar.indy.gov")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=True)
+
+def _schema_changes():
+    # (what, apply) for each column to add and index to create or rebuild
+    insp = inspect(db.engine)
+    quote = db.engine.dialect.identifier_preparer.quote
+    for table in db.metadata.sorted_tables:
+        if not insp.has_table(table.name):
+            continue
+        have = {c["name"] for c in insp.get_columns(table.name)}
+        for col in table.columns:
+            if col.name not in have:
+                ddl = col.type.compile(dialect=db.engine.dialect)
+                sql = f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(col.name)} {ddl}"
+                yield f"{table.name}.{col.name}", lambda sql=sql: (db.session.execute(text(sql)), db.session.commit())
+        have_idx = {i["name"]: bool(i["unique"]) for i in insp.get_indexes(table.name)}
+        for idx in table.indexes:
+            if idx.name not in have_idx:
+                yield idx.name, lambda idx=idx: idx.create(db.engine)
+            elif have_idx[idx.name] != bool(idx.unique):
+                # uniqueness changed (e.g. news_item.link_hash): rebuild it
+                yield idx.name, lambda idx=idx: (idx.drop(db.engine), idx.create(db.engine))
+
+def pending_schema():
+    """Names of the columns and indexes ensure_schema() would add or rebuild."""
+    return [what for what, _ in _schema_changes()]
+
+def ensure_schema():
+    """
+    db.create_all() only creates missing tables. Add the (nullable) columns
+    and indexes that were introduced after a table was first created.
+    Run from `flask init-db` (once per deploy), not from every worker.
+    Returns the names of what it changed.
+    """
+    done = []
+    for what, apply in _schema_changes():
+        apply()
+        done.append(what)
+    return done
+
+def backfill_news_link_hashes():
+    # Rows stored before link_hash existed. Later duplicates of a link (in the same section) keep NULL.
+    todo = NewsItem.query.filter(NewsItem.link_hash.is_(None)).order_by(NewsItem.id).all()
+    if not todo:
+        return
+    taken = set(db.session.query(NewsItem.link_hash, NewsItem.section).filter(NewsItem.link_hash.isnot(None)))
+    for n in todo:
+        h = link_key(n.link)
+        if (h, n.section) not in taken:
+            n.link_hash = h
+            taken.add((h, n.section))
+    db.session.commit()
@@ -0,0 +1,42 @@
+# The City's calendar feed (utils/calendar_rss.py) as the events code sees it.
+import feedparser
+import pytest
+from datetime import date, datetime
+from flask import Flask
+import utils.cache as feed_cache
+from utils import calendar_rss, event_feeds
+
+FEED_URL = "https://calendar.example.org/rss"
+
+FEED = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>City calendar</title>
+  <item><title>Council meeting</title><link>https://calendar.example.org/e/1</link>
+    <pubDate>Tue, 23 Sep 2025 22:30:00 GMT</pubDate><author>City-County Building</author></item>
+  <item><title>Undated notice</title><link>https://calendar.example.org/e/2</link></item>
+</channel></rss>"""
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(calendar_rss, "parse_feed", lambda url: feedparser.parse(FEED))
+    calendar_rss._local.clear()
+    feed_cache.cache.delete(f"calendar::{FEED_URL}")
+    app = Flask(__name__)
+    app.config["INDY_CAL_RSS_URL"] = FEED_URL
+    with app.app_context():
+        yield app
+    calendar_rss._local.clear()
+    feed_cache.cache.delete(f"calendar::{FEED_URL}")
+
+def test_undated_items_are_skipped(app):
+    assert [e["title"] for e in calendar_rss.feed_events()] == ["Council meeting"]
+
+def test_feed_times_are_local(app):
+    [ev] = calendar_rss.feed_events()
+    assert ev["start"] == datetime(2025, 9, 23, 18, 30)  # 22:30 GMT is 6:30 PM EDT
+    events, _, _ = calendar_rss.week_events_rss(2025, 39)
+    assert [e["title"] for e in events] == ["Council meeting"]
+
+def test_ics_dtstart_for_feed_event(app):
+    [ev] = calendar_rss.feed_events()
+    ics = event_feeds.to_ics([dict(ev, uid="e1")], "Week 2025-39").decode()
+    assert "DTSTART:20250923T223000Z" in ics.split("\r\n")
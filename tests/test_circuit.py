@@ -0,0 +1,179 @@
+# Circuit breaker state machine (utils/circuit.py) and how parse_feed
+# (utils/feed_fetch.py) drives it: host vs feed failures, the half-open
+# probe, and the last good copy served while a feed is failing.
+import socket
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+from utils import feed_fetch
+from utils.circuit import CircuitBreaker
+
+RSS = b"""<?xml version="1.0"?><rss version="2.0"><channel><title>T</title>
+<item><title>One</title><link>https://example.com/1</link></item>
+<item><title>Two</title><link>https://example.com/2</link></item>
+</channel></rss>"""
+
+# --- CircuitBreaker ---
+
+def _open(cb, key="k"):
+    for _ in range(cb.failures):
+        cb.failure(key, "boom")
+
+def test_opens_after_n_failures():
+    cb = CircuitBreaker(failures=3, backoff=30)
+    cb.failure("k")
+    cb.failure("k")
+    assert cb.allow("k")
+    assert cb.state("k")["state"] == "closed"
+    cb.failure("k", "boom")
+    assert not cb.allow("k")
+    st = cb.state("k")
+    assert (st["state"], st["fails"], st["opens"], st["error"]) == ("open", 3, 1, "boom")
+    assert 14.9 <= st["retry_in"] <= 30  # jittered into [backoff / 2, backoff]
+
+def test_success_resets_the_count():
+    cb = CircuitBreaker(failures=2)
+    cb.failure("k")
+    cb.success("k")
+    cb.failure("k")
+    assert cb.allow("k")
+    assert cb.state("k")["fails"] == 1
+
+def test_keys_are_independent():
+    cb = CircuitBreaker(failures=1)
+    cb.failure("host:a")
+    assert not cb.allow("host:a")
+    assert cb.allow("host:b")
+    assert cb.state("host:b") is None
+
+def test_half_open_lets_one_probe_through():
+    cb = CircuitBreaker(failures=1, backoff=0.02)
+    _open(cb)
+    time.sleep(0.03)
+    assert cb.state("k")["state"] == "half-open"
+    assert cb.allow("k")
+    assert not cb.allow("k")  # only one probe at a time
+    cb.success("k")
+    assert cb.state("k") is None
+    assert cb.allow("k")
+
+def test_failed_probe_reopens_with_a_longer_backoff():
+    cb = CircuitBreaker(failures=1, backoff=0.02, max_backoff=100)
+    _open(cb)
+    time.sleep(0.03)
+    assert cb.allow("k")
+    cb.failure("k")
+    st = cb.state("k")
+    assert (st["state"], st["opens"]) == ("open", 2)
+    assert 0.015 <= st["retry_in"] <= 0.04  # base * 2, jittered
+
+def test_backoff_is_capped():
+    cb = CircuitBreaker(failures=1, backoff=10, max_backoff=15)
+    for _ in range(5):
+        cb.failure("k")
+    assert cb.state("k")["retry_in"] <= 15
+
+def test_release_ends_a_probe_without_a_verdict():
+    cb = CircuitBreaker(failures=1, backoff=0.02)
+    _open(cb)
+    time.sleep(0.03)
+    assert cb.allow("k")
+    cb.release("k")
+    assert cb.state("k")["opens"] == 1
+    assert cb.allow("k")  # the next call may probe again
+
+# --- parse_feed ---
+
+@pytest.fixture
+def server():
+    state = {"status": 200, "hits": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            state["hits"] += 1
+            body = RSS if state["status"] == 200 else b"error"
+            self.send_response(state["status"])
+            self.send_header("Content-Type", "application/rss+xml")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, args=(0.05,), daemon=True).start()
+    state["url"] = f"http://127.0.0.1:{srv.server_port}/feed"
+    yield state
+    srv.shutdown()
+
+@pytest.fixture
+def fetcher(monkeypatch):
+    cb = CircuitBreaker(failures=2, backoff=0.05)
+    monkeypatch.setattr(feed_fetch, "breaker", cb)
+    monkeypatch.setattr(feed_fetch, "_last_good", {})
+    monkeypatch.setattr(feed_fetch, "_parsed", {})
+    monkeypatch.setattr(feed_fetch, "STATE_DB", None)
+    return cb
+
+def _closed_port():
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+def test_http_errors_count_against_the_feed_only(server, fetcher):
+    server["status"] = 500
+    host, feed = feed_fetch._breaker_keys(server["url"])
+    for _ in range(2):
+        with pytest.raises(Exception):
+            feed_fetch.parse_feed(server["url"])
+    assert fetcher.state(feed)["state"] == "open"
+    assert fetcher.state(host) is None
+    with pytest.raises(feed_fetch.CircuitOpen):
+        feed_fetch.parse_feed(server["url"])
+    assert server["hits"] == 2
+    # other feeds on the same host still go out
+    server["status"] = 200
+    assert feed_fetch.parse_feed(server["url"] + "?other").entries
+
+def test_network_errors_count_against_the_host(fetcher):
+    base = f"http://127.0.0.1:{_closed_port()}"
+    host, feed = feed_fetch._breaker_keys(base + "/a")
+    for _ in range(2):
+        with pytest.raises(Exception):
+            feed_fetch.parse_feed(base + "/a", timeout=2)
+    assert fetcher.state(host)["state"] == "open"
+    assert fetcher.state(feed) is None
+    # a different feed on the dead host is skipped without a request
+    with pytest.raises(feed_fetch.CircuitOpen):
+        feed_fetch.parse_feed(base + "/b", timeout=2)
+
+def test_probe_after_backoff_closes_the_circuit(server, fetcher):
+    server["status"] = 500
+    for _ in range(2):
+        with pytest.raises(Exception):
+            feed_fetch.parse_feed(server["url"])
+    time.sleep(0.06)
+    server["status"] = 200
+    assert len(feed_fetch.parse_feed(server["url"]).entries) == 2
+    assert fetcher.state(feed_fetch._breaker_keys(server["url"])[1]) is None
+
+def test_last_good_copy_served_while_failing(server, fetcher):
+    good = feed_fetch.parse_feed(server["url"])
+    server["status"] = 500
+    assert feed_fetch.parse_feed(server["url"]) is good  # failing
+    assert feed_fetch.parse_feed(server["url"]) is good
+    hits = server["hits"]
+    assert feed_fetch.parse_feed(server["url"]) is good  # circuit open: not even fetched
+    assert server["hits"] == hits
+
+def test_stored_body_served_after_restart(server, fetcher, monkeypatch, tmp_path):
+    monkeypatch.setattr(feed_fetch, "STATE_DB", str(tmp_path / "state.db"))
+    monkeypatch.setattr(feed_fetch, "_state_ready", False)
+    feed_fetch._save_state(server["url"], '"v1"', None, "application/rss+xml", RSS, None)
+    server["status"] = 500
+    fp = feed_fetch.parse_feed(server["url"])  # nothing in memory: parsed from the stored body
+    assert [e.title for e in fp.entries] == ["One", "Two"]
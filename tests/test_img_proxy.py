@@ -0,0 +1,126 @@
+# SSRF guards of the feed image proxy (utils/img_proxy.py): the private-address
+# check, connecting to the checked address, and the per-hop redirect checks.
+# Two local servers stand in for the web: 127.0.0.1 plays a public host and
+# 127.0.0.2 a private one.
+import socket
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+import utils.cache as feed_cache
+from utils import img_proxy
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+PUBLIC, PRIVATE = "127.0.0.1", "127.0.0.2"
+
+def _server(addr):
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append((self.headers["Host"], self.path))
+            if self.path.startswith("/redirect?to="):
+                self.send_response(302)
+                self.send_header("Location", self.path.split("=", 1)[1])
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(PNG)))
+            self.end_headers()
+            self.wfile.write(PNG)
+
+        def log_message(self, *args):
+            pass
+
+    srv = ThreadingHTTPServer((addr, 0), Handler)
+    threading.Thread(target=srv.serve_forever, args=(0.05,), daemon=True).start()
+    return srv, hits
+
+@pytest.fixture
+def web(monkeypatch):
+    public, public_hits = _server(PUBLIC)
+    private, private_hits = _server(PRIVATE)
+    names = {"cdn.test": PUBLIC, "other.test": PUBLIC, "internal.test": PRIVATE}
+    real = socket.getaddrinfo
+
+    def getaddrinfo(host, port, *args, **kwargs):
+        if host in names:
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (names[host], port))]
+        return real(host, port, *args, **kwargs)
+
+    monkeypatch.setattr(socket, "getaddrinfo", getaddrinfo)
+    monkeypatch.setattr(img_proxy, "_is_public", lambda addr: addr == PUBLIC)
+    monkeypatch.setattr(img_proxy, "ALLOW_PRIVATE", False)
+    feed_cache.cache.delete("imgproxy::hosts")
+    img_proxy._hosts.update(t=0.0, hosts={})
+    img_proxy.note_feed(["https://cdn.test/feed", "https://internal.test/feed"])
+    yield {"names": names, "port": public.server_port, "private_port": private.server_port,
+           "public_hits": public_hits, "private_hits": private_hits}
+    public.shutdown()
+    private.shutdown()
+    img_proxy._hosts.update(t=0.0, hosts={})
+
+def _url(web, path, host="cdn.test"):
+    return f"http://{host}:{web['port']}{path}"
+
+def test_fetches_from_the_checked_address(web):
+    assert img_proxy._download(_url(web, "/a.png")) == (PNG, "image/png")
+    assert web["public_hits"] == [(f"cdn.test:{web['port']}", "/a.png")]
+
+def test_private_address_refused(web):
+    url = f"http://internal.test:{web['private_port']}/a.png"
+    with pytest.raises(img_proxy.ProxyError) as e:
+        img_proxy._download(url)
+    assert e.value.status == 403
+    assert web["private_hits"] == []
+
+def test_host_resolved_once_per_hop(web, monkeypatch):
+    # DNS that answers public for the check and private afterwards must not
+    # move the connection to the private address
+    real = socket.getaddrinfo
+    seen = []
+
+    def rebinding(host, port, *args, **kwargs):
+        if host == "cdn.test":
+            seen.append(host)
+            addr = PUBLIC if len(seen) == 1 else PRIVATE
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (addr, port))]
+        return real(host, port, *args, **kwargs)
+
+    monkeypatch.setattr(socket, "getaddrinfo", rebinding)
+    assert img_proxy._download(_url(web, "/a.png"))[0] == PNG
+    assert seen == ["cdn.test"]
+    assert web["private_hits"] == []
+
+def test_redirect_is_followed(web):
+    assert img_proxy._download(_url(web, "/redirect?to=/b.png"))[0] == PNG
+    assert [path for _, path in web["public_hits"]] == ["/redirect?to=/b.png", "/b.png"]
+
+def test_redirect_to_private_host_refused(web):
+    target = f"http://internal.test:{web['private_port']}/secret"
+    with pytest.raises(img_proxy.ProxyError) as e:
+        img_proxy._download(_url(web, f"/redirect?to={target}"))
+    assert e.value.status == 403
+    assert web["private_hits"] == []
+
+def test_redirect_to_unlisted_host_refused(web):
+    with pytest.raises(img_proxy.ProxyError) as e:
+        img_proxy._download(_url(web, f"/redirect?to=http://other.test:{web['port']}/a.png"))
+    assert (e.value.status, str(e.value)) == (403, "host not in configured feeds")
+    assert len(web["public_hits"]) == 1
+
+def test_too_many_redirects(web):
+    hops = "/a.png"
+    for _ in range(img_proxy.MAX_REDIRECTS + 1):
+        hops = f"/redirect?to={hops}"
+    with pytest.raises(img_proxy.ProxyError) as e:
+        img_proxy._download(_url(web, hops))
+    assert (e.value.status, str(e.value)) == (502, "too many redirects")
+    assert len(web["public_hits"]) == img_proxy.MAX_REDIRECTS + 1
+
+def test_redirects_up_to_the_limit_are_followed(web):
+    hops = "/a.png"
+    for _ in range(img_proxy.MAX_REDIRECTS):
+        hops = f"/redirect?to={hops}"
+    assert img_proxy._download(_url(web, hops))[0] == PNG
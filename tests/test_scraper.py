@@ -0,0 +1,38 @@
+# Calendar grid extraction (utils/scraper.py).
+from datetime import date, datetime
+from utils.scraper import extract_events, parse_when
+
+WEEK = date(2025, 9, 22)
+
+def test_date_and_time_in_separate_elements():
+    html = ('<div class="events-grid"><div class="event">'
+            '<a class="event-title" href="/event/7">Budget hearing</a>'
+            '<div class="event-time"><span>Tue, Sep 23</span><span>6:30 PM</span></div>'
+            '<div class="event-location">City-County Building</div></div></div>')
+    [ev] = extract_events(html, WEEK)
+    assert ev["title"] == "Budget hearing"
+    assert ev["start"] == datetime(2025, 9, 23, 18, 30)
+    assert ev["url"] == "https://calendar.indy.gov/event/7"
+
+def test_time_nested_apart_from_title_and_location():
+    html = ('<div class="events-grid">'
+            '<div class="event"><a class="event-title" href="/event/1">Council meeting</a>'
+            '<div class="event-details"><span class="event-time">Mon, Sep 22, 6:30 PM</span></div>'
+            '<div class="event-location">City Hall</div></div>'
+            '<div class="event"><a class="event-title" href="/event/2">Parks board</a>'
+            '<div class="event-details"><span class="event-time">Wed, Sep 24, 5:00 PM</span></div>'
+            '<div class="event-location">Garfield Park</div></div></div>')
+    events = extract_events(html, WEEK)
+    assert [(e["title"], e["location"], e["url"]) for e in events] == [
+        ("Council meeting", "City Hall", "https://calendar.indy.gov/event/1"),
+        ("Parks board", "Garfield Park", "https://calendar.indy.gov/event/2"),
+    ]
+
+def test_events_outside_the_week_are_dropped():
+    html = ('<div class="event"><a href="/event/3">Next week</a>'
+            '<span class="time">Mon, Sep 29, 9:00 AM</span></div>')
+    assert extract_events(html, WEEK) == []
+
+def test_parse_when_range():
+    assert parse_when("Mon, Sep 22, 6:30 PM – 8:30 PM", WEEK) == (
+        datetime(2025, 9, 22, 18, 30), datetime(2025, 9, 22, 20, 30))
@@ -0,0 +1,81 @@
+# StreamParser (utils/feed_stream.py) must give the same FeedEntry records as
+# feedparser.parse() once both go through feeds._entry.
+import feedparser
+import pytest
+from utils.feed_stream import StreamParser
+from utils.feeds import _entry
+
+RSS = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/" xmlns:dc="http://purl.org/dc/elements/1.1/"
+     xmlns:content="http://purl.org/rss/1.0/modules/content/">
+<channel>
+  <title>Indy Local</title>
+  <link>https://example.com/</link>
+  <item>
+    <title>Council passes budget &amp; more</title>
+    <link>https://example.com/news/budget?utm_source=rss</link>
+    <guid>https://example.com/news/budget</guid>
+    <pubDate>Mon, 22 Sep 2025 18:30:00 -0400</pubDate>
+    <dc:creator>Jane Reporter</dc:creator>
+    <description><![CDATA[<p>The <b>City-County Council</b> voted 20-5.</p><script>alert(1)</script>]]></description>
+    <media:content url="https://img.example.com/budget.jpg" type="image/jpeg" medium="image"/>
+  </item>
+  <item>
+    <title>Road closures this week</title>
+    <link>https://example.com/news/roads</link>
+    <pubDate>Tue, 23 Sep 2025 09:00:00 GMT</pubDate>
+    <description>Several closures downtown.</description>
+    <enclosure url="https://img.example.com/roads.png" type="image/png" length="1234"/>
+    <source url="https://wire.example.org/feed">Wire Service</source>
+  </item>
+  <item>
+    <title>Library hours</title>
+    <link>https://example.com/news/library</link>
+    <content:encoded><![CDATA[<p><img src="https://img.example.com/lib.webp"> Open late.</p>]]></content:encoded>
+  </item>
+</channel>
+</rss>"""
+
+ATOM = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title>Indy Atom</title>
+  <entry>
+    <title>Prosecutor files charges</title>
+    <link rel="alternate" href="https://atom.example.com/a/1"/>
+    <link rel="enclosure" type="image/jpeg" href="https://img.example.com/a1.jpg"/>
+    <id>tag:atom.example.com,2025:1</id>
+    <published>2025-09-21T12:00:00Z</published>
+    <updated>2025-09-21T13:00:00Z</updated>
+    <summary type="html">&lt;p&gt;Charges were filed Friday.&lt;/p&gt;</summary>
+  </entry>
+  <entry>
+    <title>Police budget hearing</title>
+    <link href="https://atom.example.com/a/2"/>
+    <id>tag:atom.example.com,2025:2</id>
+    <updated>2025-09-20T08:15:00-04:00</updated>
+    <content type="xhtml"><div xmlns="http://www.w3.org/1999/xhtml"><p>Hearing <em>Tuesday</em>.</p></div></content>
+  </entry>
+</feed>"""
+
+def _records(fp):
+    title = fp["feed"].get("title")
+    return title, [_entry(e, title) for e in fp["entries"]]
+
+def _stream(body, limit=None, chunk=97):
+    sp = StreamParser(limit)
+    for i in range(0, len(body), chunk):
+        if sp.feed_bytes(body[i:i + chunk]):
+            break
+    else:
+        sp.close()
+    assert sp.is_feed
+    return sp.result()
+
+@pytest.mark.parametrize("body", [RSS, ATOM], ids=["rss", "atom"])
+def test_matches_feedparser(body):
+    assert _records(_stream(body)) == _records(feedparser.parse(body))
+
+@pytest.mark.parametrize("body", [RSS, ATOM], ids=["rss", "atom"])
+def test_limit_stops_early(body):
+    title, expected = _records(feedparser.parse(body))
+    assert _records(_stream(body, limit=1)) == (title, expected[:1])
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the calendar grid extraction (utils/scraper.py).
+
+    python tools/bench_scraper.py [saved-page.html ...] [--week 2025-39] [--events 60] [--rounds 20]
+
+Runs the previous BeautifulSoup extraction (kept below as the baseline) and
+scraper.extract_events over saved copies of calendar.indy.gov grid pages
+(or a generated page), and prints ms per page and the events each found.
+Save a page with e.g.
+    curl -o grid.html 'https://calendar.indy.gov/?view=grid&search=y&start=2025-09-22'
+"""
+import argparse, re, sys, time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from urllib.parse import urljoin
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from bs4 import BeautifulSoup
+from utils.scraper import BASE, extract_events
+
+def legacy_extract(html, week_monday):
+    # utils/scraper.py before the lxml rewrite, minus the HTTP fetch
+    soup = BeautifulSoup(html, "lxml")
+    candidates = soup.select('.event, .Event, .calendar-event, .fc-event, .list-event, [class*="event"]')
+    events = []
+    week_end = week_monday + timedelta(days=7)
+
+    def parse_dt(text):
+        text = re.sub(r'\s+', ' ', text or '').strip()
+        for fmt in ("%a, %b %d, %I:%M %p", "%A, %B %d, %I:%M %p", "%b %d, %Y %I:%M %p",
+                    "%m/%d/%Y %I:%M %p", "%Y-%m-%d %H:%M"):
+            try:
+                return datetime.strptime(text, fmt)
+            except ValueError:
+                pass
+        return None
+
+    for c in candidates:
+        title_el = c.select_one('.title, .event-title, a, h3, h4')
+        title = (title_el.get_text(strip=True) if title_el else "").strip()
+        link_el = title_el if title_el and title_el.name == "a" else c.select_one('a[href*="event"], a[href*="Event"]')
+        href = link_el.get("href") if link_el else None
+        when_el = c.select_one('.time, .event-time, .date, .datetime')
+        when_text = (when_el.get_text(" ", strip=True) if when_el else "").strip()
+        start_dt = end_dt = None
+        if "–" in when_text or "-" in when_text:
+            sep = "–" if "–" in when_text else "-"
+            parts = [p.strip() for p in when_text.split(sep, 1)]
+            if len(parts) == 2:
+                start_dt = parse_dt(parts[0])
+                end_dt = parse_dt(parts[1])
+        if not start_dt:
+            start_dt = parse_dt(when_text)
+        loc_el = c.select_one('.location, .event-location, .venue')
+        location = (loc_el.get_text(" ", strip=True) if loc_el else "").strip()
+        if start_dt and (week_monday <= start_dt.date() < week_end):
+            events.append({"title": title or "Untitled", "location": location or "", "start": start_dt,
+                           "end": end_dt, "url": urljoin(BASE, href) if href else None})
+    events.sort(key=lambda e: e["start"] or datetime.min)
+    return events
+
+def synthetic_page(week_monday, n):
+    # grid-like markup: a wrapper and event cards with nested event-* parts, in
+    # two layouts: time next to the title, and time inside an .event-details
+    # block with title and location outside it
+    cards = []
+    for i in range(n):
+        d = week_monday + timedelta(days=i % 7)
+        if i % 2:
+            cards.append(
+                f'<div class="event"><a class="event-title" href="/event/{i}">Council meeting {i}</a>'
+                f'<div class="event-details"><span class="event-time">{d:%a, %b} {d.day}, {1 + i % 11}:30 PM</span></div>'
+                f'<div class="event-location">City-County Building, Room {100 + i}</div></div>')
+            continue
+        cards.append(
+            f'<div class="calendar-event"><div class="event-body">'
+            f'<a class="event-title" href="/event/{i}">Committee meeting {i}</a>'
+            f'<div class="event-time">{d:%m/%d/%Y} {1 + i % 11}:30 PM</div>'
+            f'<div class="event-location">City-County Building, Room {100 + i}</div>'
+            f'</div></div>')
+    filler = "<p>" + "Lorem ipsum dolor sit amet. " * 40 + "</p>"
+    return (f'<html><head><title>Calendar</title></head><body><nav>{filler}</nav>'
+            f'<div class="events-grid">{"".join(cards)}</div><footer>{filler * 5}</footer></body></html>').encode()
+
+def bench(fn, pages, week_monday, rounds):
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for p in pages:
+            found = fn(p, week_monday)
+    return (time.perf_counter() - t0) * 1000 / (rounds * len(pages)), len(found)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("pages", nargs="*", help="saved grid pages")
+    ap.add_argument("--week", help="ISO week the pages show, YYYY-WW (default: this week)")
+    ap.add_argument("--events", type=int, default=60, help="events on the generated page")
+    ap.add_argument("--rounds", type=int, default=20)
+    args = ap.parse_args()
+
+    if args.week:
+        y, w = map(int, args.week.split("-"))
+        week_monday = date.fromisocalendar(y, w, 1)
+    else:
+        week_monday = date.today() - timedelta(days=date.today().weekday())
+    pages = [Path(f).read_bytes() for f in args.pages] or [synthetic_page(week_monday, args.events)]
+
+    old_ms, old_n = bench(legacy_extract, pages, week_monday, args.rounds)
+    new_ms, new_n = bench(extract_events, pages, week_monday, args.rounds)
+    incomplete = sum(1 for e in extract_events(pages[-1], week_monday)
+                     if e["title"] == "Untitled" or not e["location"] or not e["url"])
+    print(f"{len(pages)} page(s), {args.rounds} rounds; events on the last page: legacy {old_n}, lxml {new_n}"
+          f" ({incomplete} missing a title, location or link)")
+    print(f"  legacy (BeautifulSoup + strptime): {old_ms:8.2f} ms / page")
+    print(f"  lxml + XPath + compiled regex:     {new_ms:8.2f} ms / page")
+    print(f"  speedup:                           {old_ms / new_ms:8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# utils/article_render.py
+# Everything the article pages and listings need from a post's (already
+# sanitized) HTML, worked out once when the post is saved:
+#   body_html        content with lazy/async <img> carrying width/height,
+#                    and ids on h2/h3 for the table of contents
+#   excerpt          plain-text teaser for cards without a summary
+#   word_count, reading_minutes
+#   toc              [[level, id, text], ...] of the h2/h3 headings
+import re, time, struct, json, logging
+from html import escape
+from pathlib import Path
+import lxml.html
+from utils import http_client
+from utils.feeds import excerpt as _excerpt
+
+log = logging.getLogger(__name__)
+
+# bump when the output below changes; `flask derive-posts` re-renders older posts
+VERSION = 1
+WORDS_PER_MINUTE = 230
+PROBE_BYTES = 64 * 1024  # enough of an image to find its dimensions
+PROBE_TIMEOUT = 3        # seconds per remote image
+PROBE_BUDGET = 8         # seconds of remote probing per post save; later images go without dimensions
+SIZE_CACHE = 512
+_sizes = {}  # {(src, static_dir): (w, h)}; found ones only, so a failed probe is tried again next save
+_WORD_RE = re.compile(r"\w+(?:['’-]\w+)*", re.UNICODE)
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+def image_size(data):
+    """(width, height) from the first bytes of a PNG, GIF, JPEG or WebP; None if unknown."""
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and len(data) >= 24:
+        return struct.unpack(">II", data[16:24])
+    if data[:6] in (b"GIF87a", b"GIF89a") and len(data) >= 10:
+        return struct.unpack("<HH", data[6:10])
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP" and len(data) >= 30:
+        chunk = data[12:16]
+        if chunk == b"VP8 ":
+            w, h = struct.unpack("<HH", data[26:30])
+            return w & 0x3FFF, h & 0x3FFF
+        if chunk == b"VP8L":
+            b = data[21:25]
+            return 1 + (((b[1] & 0x3F) << 8) | b[0]), 1 + (((b[3] & 0xF) << 10) | (b[2] << 2) | ((b[1] & 0xC0) >> 6))
+        if chunk == b"VP8X":
+            return 1 + int.from_bytes(data[24:27], "little"), 1 + int.from_bytes(data[27:30], "little")
+        return None
+    if data[:2] == b"\xff\xd8":
+        i = 2
+        while i + 9 < len(data):
+            if data[i] != 0xFF:
+                return None
+            marker = data[i + 1]
+            if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+                i += 2
+                continue
+            seg = struct.unpack(">H", data[i + 2:i + 4])[0]
+            # SOF0..SOF15, minus DHT/JPG/DAC
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                h, w = struct.unpack(">HH", data[i + 5:i + 9])
+                return w, h
+            i += 2 + seg
+    return None
+
+def src_size(src, static_dir, remote=True):
+    """
+    Dimensions of an <img src>: /static/ files are read from disk, http(s)
+    ones probed (remote=False: only if already known).
+    """
+    size = _sizes.get((src, static_dir))
+    if size is None and (remote or not src.startswith(("http://", "https://"))):
+        size = _probe(src, static_dir)
+        if size:
+            if len(_sizes) >= SIZE_CACHE:
+                _sizes.clear()
+            _sizes[(src, static_dir)] = size
+    return size
+
+def _probe(src, static_dir):
+    try:
+        if src.startswith("/static/"):
+            path = (Path(static_dir) / src[len("/static/"):]).resolve()
+            if not path.is_relative_to(Path(static_dir).resolve()):
+                return None
+            with open(path, "rb") as f:
+                return image_size(f.read(PROBE_BYTES))
+        if src.startswith(("http://", "https://")):
+            with http_client.get(src, stream=True, timeout=PROBE_TIMEOUT) as r:
+                if r.status_code != 200:
+                    return None
+                data = b""
+                for chunk in r.iter_content(8192):
+                    data += chunk
+                    size = image_size(data)
+                    if size or len(data) >= PROBE_BYTES:
+                        return size
+    except Exception as e:
+        log.info("image size unavailable for %s: %s", src, e)
+    return None
+
+def _slug(text, taken):
+    base = _SLUG_RE.sub("-", text.lower()).strip("-")[:60] or "section"
+    slug, n = base, 2
+    while slug in taken:
+        slug, n = f"{base}-{n}", n + 1
+    taken.add(slug)
+    return slug
+
+def derive(html, static_dir):
+    """The derived fields for a post body, as a dict of Post column values."""
+    if not (html or "").strip():
+        return {"body_html": html or "", "excerpt": None, "word_count": 0, "reading_minutes": 0,
+                "toc_json": "[]", "derived_version": VERSION}
+    root = lxml.html.fragment_fromstring(html, create_parent="div")
+
+    deadline = time.monotonic() + PROBE_BUDGET
+    for img in root.iter("img"):
+        img.set("loading", "lazy")
+        img.set("decoding", "async")
+        src = (img.get("src") or "").strip()
+        if src and not (img.get("width") and img.get("height")):
+            # past PROBE_BUDGET remote images go without width/height rather than hold up the save
+            size = src_size(src, str(static_dir), remote=time.monotonic() < deadline)
+            if size:
+                img.set("width", str(size[0]))
+                img.set("height", str(size[1]))
+
+    toc, taken = [], {el.get("id") for el in root.iter() if el.get("id")}
+    for h in root.iter("h2", "h3"):
+        text = re.sub(r"\s+", " ", h.text_content()).strip()
+        if not text:
+            continue
+        if not h.get("id"):
+            h.set("id", _slug(text, taken))
+        toc.append([int(h.tag[1]), h.get("id"), text])
+
+    words = len(_WORD_RE.findall(root.text_content()))
+    body = escape(root.text or "", quote=False) + "".join(lxml.html.tostring(el, encoding="unicode") for el in root)
+    return {
+        "body_html": body,
+        "excerpt": _excerpt(html),
+        "word_count": words,
+        "reading_minutes": max(1, round(words / WORDS_PER_MINUTE)) if words else 0,
+        "toc_json": json.dumps(toc, ensure_ascii=False),
+        "derived_version": VERSION,
+    }
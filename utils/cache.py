@@ -0,0 +1,240 @@
+# utils/cache.py
+import time, pickle, sqlite3, logging, threading
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
+
+# Past ttl an entry is still served (and refreshed in the background) for
+# this many seconds; after that the request waits for a fresh load.
+MAX_STALE = 1800
+
+# --- backends: get(key) -> value|None, set(key, value, expire=None), delete(key) ---
+
+def _sizeof(value):
+    # approximate footprint: what the value costs once serialized
+    try:
+        return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 1024
+
+class LRUCache:
+    """
+    Per-process cache with per-key TTL and LRU eviction, bounded both by
+    entry count and by the approximate size of the stored values
+    (max_bytes=None skips the size accounting).
+    """
+
+    def __init__(self, max_entries=256, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._d = OrderedDict()  # {key: (expires, size, value)}, oldest first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def _drop(self, key):
+        ent = self._d.pop(key, None)
+        if ent:
+            self._bytes -= ent[1]
+
+    def get(self, key):
+        with self._lock:
+            ent = self._d.get(key)
+            if ent and ent[0] and ent[0] < time.time():
+                self._drop(key)
+                self.expirations += 1
+                ent = None
+            if ent is None:
+                self.misses += 1
+                return None
+            self._d.move_to_end(key)
+            self.hits += 1
+            return ent[2]
+
+    def set(self, key, value, expire=None):
+        size = _sizeof(value) if self.max_bytes else 0
+        with self._lock:
+            self._drop(key)
+            if self.max_bytes and size > self.max_bytes:
+                # would push out everything else and still not fit
+                log.warning("cache value too large to keep (%d bytes): %s", size, key)
+                return
+            self._d[key] = (time.time() + expire if expire else 0, size, value)
+            self._bytes += size
+            while len(self._d) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes):
+                self._drop(next(iter(self._d)))
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._drop(key)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._d), "bytes": self._bytes,
+                    "max_entries": self.max_entries, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses,
+                    "evictions": self.evictions, "expirations": self.expirations}
+
+class SQLiteCache:
+    """On-disk cache shared by every worker on the host (one file, WAL mode)."""
+
+    _PURGE_EVERY = 200  # sets between sweeps of expired rows
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+        self._sets = 0
+
+    def _conn(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("""CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY, expires REAL, value BLOB)""")
+            self._local.con = con
+        return con
+
+    def get(self, key):
+        try:
+            row = self._conn().execute("SELECT expires, value FROM cache WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            log.warning("cache read failed: %s", e)
+            return None
+        if not row or (row[0] and row[0] < time.time()):
+            return None
+        return pickle.loads(row[1])
+
+    def set(self, key, value, expire=None):
+        con = self._conn()
+        try:
+            with con:
+                con.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?)",
+                            (key, time.time() + expire if expire else 0, pickle.dumps(value, pickle.HIGHEST_PROTOCOL)))
+                self._sets += 1
+                if self._sets % self._PURGE_EVERY == 0:
+                    con.execute("DELETE FROM cache WHERE expires > 0 AND expires < ?", (time.time(),))
+        except sqlite3.Error as e:
+            log.warning("cache write failed: %s", e)
+
+    def delete(self, key):
+        con = self._conn()
+        with con:
+            con.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+class RedisCache:
+    """
+    Shared across nodes. Needs the `redis` package unless a client object is
+    passed in (any stand-in with get/set(ex=)/delete works, e.g. in tests).
+    """
+
+    def __init__(self, url=None, client=None, prefix="nni:"):
+        if client is None:
+            import redis  # optional dependency, only for CACHE_BACKEND=redis
+            client = redis.Redis.from_url(url)
+        self.r = client
+        self.prefix = prefix
+
+    def get(self, key):
+        try:
+            raw = self.r.get(self.prefix + key)
+        except Exception as e:
+            log.warning("cache read failed: %s", e)
+            return None
+        return pickle.loads(raw) if raw else None
+
+    def set(self, key, value, expire=None):
+        try:
+            self.r.set(self.prefix + key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                       ex=int(expire) + 1 if expire else None)
+        except Exception as e:
+            log.warning("cache write failed: %s", e)
+
+    def delete(self, key):
+        self.r.delete(self.prefix + key)
+
+def make_cache(backend="memory", url=None, max_entries=256, max_bytes=32 * 1024 * 1024):
+    backend = (backend or "memory").lower()
+    if backend == "sqlite":
+        return SQLiteCache(url)
+    if backend == "redis":
+        return RedisCache(url)
+    return LRUCache(max_entries, max_bytes)
+
+cache = LRUCache()
+
+_locks = {}          # {key: Lock} one loader per key at a time (per process)
+_refreshing = set()  # keys with a background refresh in flight
+_guard = threading.Lock()
+
+def configure(max_stale=None, backend=None, url=None, max_entries=256, max_bytes=32 * 1024 * 1024):
+    global MAX_STALE, cache
+    if max_stale is not None: MAX_STALE = int(max_stale)
+    if backend: cache = make_cache(backend, url, max_entries, max_bytes)
+
+def _key_lock(key):
+    with _guard:
+        lk = _locks.get(key)
+        if lk is None:
+            lk = _locks[key] = threading.Lock()
+        return lk
+
+def _load(store, key, loader, expire):
+    value = loader()
+    store.set(key, {"t": time.time(), "items": value}, expire)
+    return value
+
+def _refresh_in_background(store, key, loader, expire):
+    with _guard:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def run():
+        try:
+            with _key_lock(key):
+                _load(store, key, loader, expire)
+        except Exception:
+            log.exception("background refresh failed: %s", key)
+        finally:
+            with _guard:
+                _refreshing.discard(key)
+
+    threading.Thread(target=run, name="swr-refresh", daemon=True).start()
+
+def swr_get(key, loader, ttl, max_stale=None, store=None):
+    """
+    Stale-while-revalidate lookup in the configured cache backend.
+      - fresh (age < ttl): returned as is
+      - stale (age < ttl + max_stale): returned as is, one background refresh started
+      - missing or older: loaded in this request; concurrent callers for the
+        same key wait for that single load instead of each fetching upstream
+    ttl <= 0 bypasses the cache and always loads.
+    """
+    store = store or cache
+    max_stale = MAX_STALE if max_stale is None else max_stale
+    expire = max(ttl, 0) + max_stale
+    if ttl <= 0:
+        return _load(store, key, loader, expire)
+
+    ent = store.get(key)
+    if ent:
+        age = time.time() - ent["t"]
+        if age < ttl:
+            return ent["items"]
+        if age < ttl + max_stale:
+            _refresh_in_background(store, key, loader, expire)
+            return ent["items"]
+
+    with _key_lock(key):
+        ent = store.get(key)  # another thread may have loaded it while we waited
+        if ent and time.time() - ent["t"] < ttl:
+            return ent["items"]
+        try:
+            return _load(store, key, loader, expire)
+        except Exception:
+            if not ent:
+                raise
+            log.exception("refresh failed, serving stale entry: %s", key)
+            return ent["items"]
@@ -1,20 +1,79 @@
-import feedparser
-from datetime import date, datetime, timedelta
-from time import mktime
+import time, threading
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
 from flask import current_app
+from utils.cache import swr_get
+from utils.feed_fetch import parse_feed
+
+TZ = ZoneInfo("America/Indiana/Indianapolis")
+CAL_TTL = 900  # seconds
+PREFETCH_AT = 0.75  # refresh the index ahead of time once it is this far into CAL_TTL
+LOCAL_TTL = 60  # seconds a worker reuses its copy before checking the shared cache again
+
+# The whole feed is parsed once into {"built": t, "weeks": {"YYYY-WW": [items
+# sorted by start]}} and kept in the shared cache under one key, so every
+# worker uses the same parse. Each worker also keeps the last copy it read for
+# LOCAL_TTL, so a week lookup is a dict hit instead of an unpickle.
+_local = {}  # {key: (read at, index)}
+
+_stats = {"lookups": 0, "misses": 0, "loads": 0, "prefetches": 0}
 
 def _week_bounds(iso_year: int, iso_week: int):
     start = date.fromisocalendar(iso_year, iso_week, 1)   # Monday
     end = start + timedelta(days=6)                        # Sunday (inclusive for header)
     return start, end
 
+def _week_key(iso_year: int, iso_week: int):
+    return f"{iso_year}-{iso_week:02d}"
+
 def _entry_dt(entry):
-    # Prefer published_parsed -> updated_parsed -> now
-    if getattr(entry, "published_parsed", None):
-        return datetime.fromtimestamp(mktime(entry.published_parsed))
-    if getattr(entry, "updated_parsed", None):
-        return datetime.fromtimestamp(mktime(entry.updated_parsed))
-    return datetime.utcnow()
+    # published_parsed -> updated_parsed (UTC struct_time) as naive Indianapolis
+    # time, like the rest of the events code; None for an undated item, which
+    # can't be put in a week (and would get a new start on every sync)
+    for key in ("published_parsed", "updated_parsed"):
+        st = getattr(entry, key, None)
+        if st:
+            return datetime(*st[:6], tzinfo=timezone.utc).astimezone(TZ).replace(tzinfo=None)
+    return None
+
+def _build_index(url):
+    feed = parse_feed(url)
+    weeks = {}
+    for e in getattr(feed, "entries", []):
+        dt = _entry_dt(e)
+        if dt is None:
+            continue
+        iso = dt.isocalendar()
+        # Many civic RSS feeds put location in author or a custom tag; grab both if present
+        loc = getattr(e, "location", "") or getattr(e, "author", "") or ""
+        weeks.setdefault(_week_key(iso[0], iso[1]), []).append({
+            "title": getattr(e, "title", "Untitled"),
+            "start": dt,
+            "end": None,
+            "location": loc,
+            "url": getattr(e, "link", None),
+        })
+    for items in weeks.values():
+        items.sort(key=lambda x: x["start"])
+    _stats["loads"] += 1
+    return {"built": time.time(), "weeks": weeks}
+
+def _index(url, ttl=None):
+    """(index, loaded in this call). ttl given (prefetch) skips the per-process copy."""
+    key = f"calendar::{url}"
+    hit = _local.get(key)
+    if hit and ttl is None and time.time() - hit[0] < LOCAL_TTL:
+        return hit[1], False
+
+    caller, inline = threading.get_ident(), []
+
+    def load():
+        inline.append(threading.get_ident() == caller)
+        return _build_index(url)
+
+    idx = swr_get(key, load, ttl or CAL_TTL)
+    _local[key] = (time.time(), idx)
+    return idx, any(inline)
 
 def week_events_rss(iso_year: int, iso_week: int):
     """
@@ -25,23 +84,44 @@ def week_events_rss(iso_year: int, iso_week: int):
     if not url:
         return [], None, None
 
-    feed = feedparser.parse(url)
     start_d, end_d = _week_bounds(iso_year, iso_week)
+    idx, loaded = _index(url)
+    _stats["lookups"] += 1
+    _stats["misses"] += loaded
+    return idx["weeks"].get(_week_key(iso_year, iso_week), []), start_d, end_d
 
-    items = []
-    for e in getattr(feed, "entries", []):
-        dt = _entry_dt(e)
-        if start_d <= dt.date() <= end_d:
-            title = getattr(e, "title", "Untitled")
-            link = getattr(e, "link", None)
-            # Many civic RSS feeds put location in author or a custom tag; grab both if present
-            loc = getattr(e, "location", "") or getattr(e, "author", "") or ""
-            items.append({
-                "title": title,
-                "start": dt,
-                "end": None,
-                "location": loc,
-                "url": link,
-            })
-    items.sort(key=lambda x: x["start"])
-    return items, start_d, end_d
+def feed_events():
+    """Every event in the City's feed (all weeks), for the CalendarEvent sync."""
+    url = current_app.config.get("INDY_CAL_RSS_URL")
+    if not url:
+        return []
+    idx, _ = _index(url)
+    return [e for items in idx["weeks"].values() for e in items]
+
+def prefetch():
+    """
+    Warm the calendar for the prev/next links. Every week lives in the one
+    index, so this refreshes the index in the background once it is close to
+    expiring, and the next click finds it fresh instead of waiting on the feed.
+    """
+    url = current_app.config.get("INDY_CAL_RSS_URL")
+    hit = _local.get(f"calendar::{url}") if url else None
+    if not url or (hit and time.time() - hit[1]["built"] < CAL_TTL * PREFETCH_AT):
+        return
+    _stats["prefetches"] += 1
+    threading.Thread(target=_index, args=(url, int(CAL_TTL * PREFETCH_AT)),
+                     name="calendar-prefetch", daemon=True).start()
+
+def cache_info():
+    """Index age and hit rate for /admin/debug-events (this process's copy)."""
+    url = current_app.config.get("INDY_CAL_RSS_URL")
+    hit = _local.get(f"calendar::{url}") if url else None
+    idx = hit[1] if hit else None
+    lookups = _stats["lookups"]
+    return {
+        "age": round(time.time() - idx["built"], 1) if idx else None,
+        "weeks": len(idx["weeks"]) if idx else 0,
+        "events": sum(len(v) for v in idx["weeks"].values()) if idx else 0,
+        "hit_rate": round(1 - _stats["misses"] / lookups, 3) if lookups else None,
+        **_stats,
+    }
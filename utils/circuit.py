@@ -0,0 +1,74 @@
+# utils/circuit.py
+import time, random, threading
+
+class CircuitBreaker:
+    """
+    Per-key (host or feed URL) circuit breaker.
+      - closed: calls go through; `failures` in a row open it
+      - open: calls are skipped until a jittered, exponentially growing
+        backoff (base * 2**(opens-1), capped at max_backoff) has passed
+      - half-open: one probe call goes through; success closes the circuit,
+        failure opens it again with the next, longer backoff
+    State is per process.
+    """
+
+    def __init__(self, failures=3, backoff=30.0, max_backoff=1800.0):
+        self.failures = failures
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._s = {}  # {key: {"fails", "opens", "until", "probing", "error"}}
+        self._lock = threading.Lock()
+
+    def allow(self, key):
+        """True if a call for `key` may go out now (closed, or the half-open probe)."""
+        with self._lock:
+            s = self._s.get(key)
+            if not s or s["until"] is None:
+                return True
+            if s["probing"] or time.time() < s["until"]:
+                return False
+            s["probing"] = True
+            return True
+
+    def release(self, key):
+        """End a probe without a verdict (the call never reached this key's target)."""
+        with self._lock:
+            s = self._s.get(key)
+            if s:
+                s["probing"] = False
+
+    def success(self, key):
+        with self._lock:
+            self._s.pop(key, None)
+
+    def failure(self, key, error=None):
+        with self._lock:
+            s = self._s.setdefault(key, {"fails": 0, "opens": 0, "until": None, "probing": False, "error": None})
+            s["fails"] += 1
+            s["error"] = error
+            if s["probing"] or s["fails"] >= self.failures:
+                s["opens"] += 1
+                delay = min(self.max_backoff, self.backoff * 2 ** (s["opens"] - 1))
+                # jitter so feeds that died together don't all retry together
+                s["until"] = time.time() + delay * random.uniform(0.5, 1.0)
+                s["probing"] = False
+
+    def state(self, key):
+        """None when closed and healthy, else {"state", "fails", "opens", "retry_in", "error"}."""
+        with self._lock:
+            s = self._s.get(key)
+            if not s:
+                return None
+            if s["until"] is None:
+                state = "closed"
+            elif s["probing"] or time.time() >= s["until"]:
+                state = "half-open"
+            else:
+                state = "open"
+            return {"state": state, "fails": s["fails"], "opens": s["opens"], "error": s["error"],
+                    "retry_in": max(0.0, s["until"] - time.time()) if s["until"] else None}
+
+    def configure(self, failures=None, backoff=None, max_backoff=None):
+        if failures: self.failures = int(failures)
+        if backoff: self.backoff = float(backoff)
+        if max_backoff: self.max_backoff = float(max_backoff)
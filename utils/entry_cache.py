@@ -0,0 +1,34 @@
+# utils/entry_cache.py
+import hashlib
+from utils.cache import LRUCache
+
+# Normalized entries are small; count-bounded is enough (a few refreshes' worth).
+ENTRY_MEMO_SIZE = 4096
+
+_memo = LRUCache(max_entries=ENTRY_MEMO_SIZE, max_bytes=None)
+
+# everything the normalizers read from an entry
+_FIELDS = ("id", "title", "link", "summary", "published", "updated", "content",
+           "media_content", "media_thumbnail", "links", "source")
+
+def entry_key(entry, *extra):
+    # entry id plus a hash of its content, so an edited story is re-normalized
+    raw = repr([entry.get(f) for f in _FIELDS] + list(extra))
+    digest = hashlib.blake2b(raw.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+    return f"{entry.get('id') or entry.get('link') or ''}:{digest}"
+
+def normalized(kind, entry, build, *extra):
+    """
+    build(entry) memoized on the entry's id and content. `kind` keeps the
+    different normalizers apart; `extra` adds anything else build() reads
+    (e.g. the feed title).
+    """
+    key = f"{kind}::{entry_key(entry, *extra)}"
+    out = _memo.get(key)
+    if out is None:
+        out = build(entry)
+        _memo.set(key, out)
+    return out
+
+def stats():
+    return _memo.stats()
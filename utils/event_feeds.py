@@ -0,0 +1,68 @@
+# utils/event_feeds.py
+# iCalendar (RFC 5545) and JSON renderings of a week of events, as served
+# at /events/<YYYY-WW>.ics and .json. Event starts/ends are naive local
+# (Indianapolis) times, like everywhere else in the events code.
+import json
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+TZ = ZoneInfo("America/Indiana/Indianapolis")
+PRODID = "-//NewsNowIndy//Events//EN"
+UID_DOMAIN = "newsnowindy.com"
+
+def _utc(dt):
+    return dt.replace(tzinfo=TZ).astimezone(timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+def _ics_dt(dt):
+    return _utc(dt).strftime("%Y%m%dT%H%M%SZ")
+
+def _ics_text(s):
+    return (s or "").replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\r\n", "\\n").replace("\n", "\\n")
+
+def _fold(line):
+    # content lines are capped at 75 octets; continuation lines start with a space
+    raw = line.encode("utf-8")
+    if len(raw) <= 75:
+        return line
+    parts, start, limit = [], 0, 75
+    while start < len(raw):
+        end = min(start + limit, len(raw))
+        while end < len(raw) and (raw[end] & 0xC0) == 0x80:  # don't split a UTF-8 sequence
+            end -= 1
+        parts.append(raw[start:end].decode("utf-8"))
+        start, limit = end, 74
+    return "\r\n ".join(parts)
+
+def to_ics(events, name, stamp=None):
+    """events: dicts with uid, title, start, end, location, url."""
+    stamp = _ics_dt(stamp or datetime.now(timezone.utc))
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", f"PRODID:{PRODID}", "CALSCALE:GREGORIAN",
+             "METHOD:PUBLISH", f"X-WR-CALNAME:{_ics_text(name)}", "X-WR-TIMEZONE:America/Indiana/Indianapolis"]
+    for e in events:
+        lines += ["BEGIN:VEVENT", f"UID:{e['uid']}@{UID_DOMAIN}", f"DTSTAMP:{stamp}",
+                  f"DTSTART:{_ics_dt(e['start'])}"]
+        if e.get("end") and e["end"] > e["start"]:
+            lines.append(f"DTEND:{_ics_dt(e['end'])}")
+        lines.append(f"SUMMARY:{_ics_text(e['title'])}")
+        if e.get("location"):
+            lines.append(f"LOCATION:{_ics_text(e['location'])}")
+        if e.get("url"):
+            lines.append(f"URL:{e['url']}")
+        lines.append("END:VEVENT")
+    lines.append("END:VCALENDAR")
+    return ("\r\n".join(_fold(l) for l in lines) + "\r\n").encode("utf-8")
+
+def to_json(events, week, start_d, end_d):
+    return json.dumps({
+        "week": week,
+        "start": start_d.isoformat(),
+        "end": end_d.isoformat(),
+        "events": [{
+            "uid": e["uid"],
+            "title": e["title"],
+            "start": e["start"].replace(tzinfo=TZ).isoformat(),
+            "end": e["end"].replace(tzinfo=TZ).isoformat() if e.get("end") else None,
+            "location": e.get("location") or None,
+            "url": e.get("url"),
+        } for e in events],
+    }, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
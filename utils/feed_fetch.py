@@ -0,0 +1,329 @@
+# utils/feed_fetch.py
+import time, logging, threading, sqlite3, requests, feedparser
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, wait
+from utils.feed_stream import StreamParser
+from utils.circuit import CircuitBreaker
+from utils import feed_stats, http_client
+
+log = logging.getLogger(__name__)
+
+# Defaults; app.py overrides them from Config via configure().
+FEED_TIMEOUT = 6.0     # seconds one feed may take (connect + full body)
+FEED_DEADLINE = 10.0   # seconds a whole refresh may take
+FEED_WORKERS = 8       # shared pool size
+FEED_MAX_BYTES = 2 * 1024 * 1024  # never read more of one feed than this
+STREAM_PARSE = True    # parse while downloading and stop at the entry limit
+DRAIN_BYTES = 64 * 1024  # after an early stop, read at most this much more to keep the connection
+STATE_DB = None        # sqlite file holding ETag/Last-Modified per feed
+
+_pool = None
+_pool_lock = threading.Lock()
+_state_ready = False
+
+# Last parsed result per feed, reused when the server answers 304.
+# "limit" is the entry count the parse stopped at (None = whole feed).
+_parsed = {}  # {url: {"etag", "modified", "limit", "fp"}}
+
+# Last successful parse per feed, served while the feed is failing.
+_last_good = {}  # {url: fp}
+
+# Network failures (timeouts, refused/unresolvable) count against the host, so
+# every feed on a dead host backs off together; HTTP errors and unparseable
+# bodies only count against that feed.
+breaker = CircuitBreaker()
+
+class CircuitOpen(Exception):
+    pass
+
+def configure(timeout=None, deadline=None, workers=None, state_db=None, max_bytes=None, parser=None,
+              breaker_failures=None, breaker_backoff=None, breaker_max_backoff=None):
+    global FEED_TIMEOUT, FEED_DEADLINE, FEED_WORKERS, STATE_DB, FEED_MAX_BYTES, STREAM_PARSE
+    breaker.configure(breaker_failures, breaker_backoff, breaker_max_backoff)
+    if timeout: FEED_TIMEOUT = float(timeout)
+    if deadline: FEED_DEADLINE = float(deadline)
+    if workers: FEED_WORKERS = int(workers)
+    if state_db: STATE_DB = str(state_db)
+    if max_bytes: FEED_MAX_BYTES = int(max_bytes)
+    if parser: STREAM_PARSE = parser == "stream"
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=FEED_WORKERS, thread_name_prefix="feed-fetch")
+        return _pool
+
+def _open(url, timeout, headers=None):
+    r = http_client.get(url, headers=headers, stream=True, timeout=timeout)
+    try:
+        r.raise_for_status()
+    except Exception:
+        r.close()
+        raise
+    return r
+
+def _read(r, url, t0, timeout, sink=None):
+    """
+    Read the body under the time and FEED_MAX_BYTES caps. `sink(chunk)` sees
+    every chunk and can return True to stop early. Returns (body, stopped).
+    """
+    chunks, total = [], 0
+    it = r.iter_content(16384)
+    for chunk in it:
+        chunks.append(chunk)
+        total += len(chunk)
+        if time.monotonic() - t0 > timeout:
+            raise requests.Timeout(f"{url}: body not done after {timeout}s")
+        if sink and sink(chunk):
+            _drain(r, it, t0, timeout)
+            return b"".join(chunks), True
+        if total >= FEED_MAX_BYTES:
+            log.warning("feed body over %d bytes, truncated: %s", FEED_MAX_BYTES, url)
+            break
+    return b"".join(chunks), False
+
+def _drain(r, it, t0, timeout):
+    # Closing a response with unread body drops its keep-alive connection, so
+    # when little of the feed is left after an early stop, read and discard it
+    # and the connection goes back to the pool. A larger remainder costs more
+    # to download than a new connection does, so that one is just closed.
+    size = r.headers.get("Content-Length", "")
+    if size.isdigit() and int(size) - r.raw.tell() > DRAIN_BYTES:
+        return
+    left = DRAIN_BYTES
+    try:
+        for chunk in it:
+            left -= len(chunk)
+            if left < 0 or time.monotonic() - t0 > timeout:
+                return
+    except requests.RequestException:
+        pass  # the parse already has what it needs
+
+def http_get(url, timeout=None, headers=None):
+    """
+    GET url and return (status, headers, body bytes). `timeout` bounds the
+    whole download, not just each socket read, so a server dribbling bytes
+    can't hold a worker past its budget.
+    """
+    timeout = timeout or FEED_TIMEOUT
+    t0 = time.monotonic()
+    r = _open(url, timeout, headers)
+    try:
+        body, _ = _read(r, url, t0, timeout)
+        return r.status_code, r.headers, body
+    finally:
+        r.close()
+
+# --- validator store (survives worker restarts; shared by all workers) ---
+
+def _state_conn():
+    global _state_ready
+    con = sqlite3.connect(STATE_DB, timeout=5)
+    if not _state_ready:
+        con.execute("""CREATE TABLE IF NOT EXISTS feed_state (
+            url TEXT PRIMARY KEY, etag TEXT, modified TEXT,
+            content_type TEXT, body BLOB, updated REAL, lim INTEGER)""")
+        if "lim" not in {row[1] for row in con.execute("PRAGMA table_info(feed_state)")}:
+            con.execute("ALTER TABLE feed_state ADD COLUMN lim INTEGER")
+        _state_ready = True
+    return con
+
+def _load_state(url):
+    if not STATE_DB:
+        return None
+    try:
+        con = _state_conn()
+        try:
+            row = con.execute("SELECT etag, modified, content_type, body, lim FROM feed_state WHERE url = ?", (url,)).fetchone()
+        finally:
+            con.close()
+    except sqlite3.Error as e:
+        log.warning("feed state read failed: %s", e)
+        return None
+    if not row:
+        return None
+    return {"etag": row[0], "modified": row[1], "content_type": row[2], "body": row[3], "limit": row[4]}
+
+def _save_state(url, etag, modified, content_type, body, limit):
+    if not STATE_DB:
+        return
+    try:
+        con = _state_conn()
+        try:
+            with con:
+                con.execute("INSERT OR REPLACE INTO feed_state (url, etag, modified, content_type, body, updated, lim) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (url, etag, modified, content_type, body, time.time(), limit))
+        finally:
+            con.close()
+    except sqlite3.Error as e:
+        log.warning("feed state write failed: %s", e)
+
+def _covers(have, want):
+    # does a parse that stopped at `have` entries serve a request for `want`?
+    return have is None or (want is not None and want <= have)
+
+def _parse(url, body, content_type, limit=None):
+    """Parse a stored body. Returns (fp, limit the parse stopped at or None)."""
+    if STREAM_PARSE and limit:
+        sp = StreamParser(limit)
+        stopped = sp.feed_bytes(body)
+        if not stopped:
+            sp.close()
+        if sp.is_feed:
+            return sp.result(), (limit if stopped else None)
+    return feedparser.parse(body, response_headers={
+        "content-type": content_type or "",
+        "content-location": url,
+    }), None
+
+def parse_feed(url, timeout=None, limit=None):
+    """
+    Drop-in for feedparser.parse(url), with a time limit on the download and
+    a conditional GET: the feed's last ETag/Last-Modified are sent and a 304
+    reuses the previous parse instead of downloading and parsing again.
+
+    With `limit`, RSS/Atom is parsed while it downloads and the download
+    stops once `limit` entries are in (anything else goes to feedparser).
+    """
+    host, feed = _breaker_keys(url)
+    skip = not breaker.allow(host)
+    if not skip and not breaker.allow(feed):
+        breaker.release(host)  # in case allow(host) just started a probe
+        skip = True
+    if skip:
+        feed_stats.record(url, error="skipped: circuit open")
+        return _fallback(url, limit, CircuitOpen(url))
+    try:
+        with feed_stats.timed(url) as sample:
+            fp = _fetch_parse(url, timeout or FEED_TIMEOUT, limit, sample)
+            sample["entries"] = len(fp.entries or [])
+    except Exception as e:
+        err = f"{type(e).__name__}: {e}"[:200]
+        if isinstance(e, (requests.ConnectionError, requests.Timeout)):
+            breaker.failure(host, err)
+            breaker.release(feed)
+        else:
+            breaker.success(host)  # the host answered; only this feed is broken
+            breaker.failure(feed, err)
+        return _fallback(url, limit, e)
+    breaker.success(host)
+    breaker.success(feed)
+    _last_good[url] = fp
+    return fp
+
+def _breaker_keys(url):
+    return "host:" + (urlsplit(url).netloc or url).lower(), "feed:" + url
+
+def circuit_state(url):
+    """This process's breaker state for the feed (its host's if that one is tripped), or None."""
+    host, feed = _breaker_keys(url)
+    return breaker.state(host) or breaker.state(feed)
+
+def _fallback(url, limit, err):
+    """The feed's last good parse (this process's, else the stored body), or re-raise."""
+    fp = _last_good.get(url)
+    if fp is None:
+        stored = _load_state(url)
+        if stored and stored["body"]:
+            try:
+                fp, _ = _parse(url, stored["body"], stored["content_type"], limit)
+            except Exception:
+                fp = None
+            if fp is not None:
+                _last_good[url] = fp
+    if fp is None:
+        raise err
+    log.warning("feed unavailable (%s), serving last good copy: %s", type(err).__name__, url)
+    return fp
+
+def _fetch_parse(url, timeout, limit, sample):
+    mem = _parsed.get(url)
+    if mem and not _covers(mem["limit"], limit):
+        mem = None
+    stored = None if mem else _load_state(url)
+    if stored and not _covers(stored["limit"], limit):
+        stored = None
+    known = mem or stored
+
+    cond = {}
+    if known and known.get("etag"): cond["If-None-Match"] = known["etag"]
+    if known and known.get("modified"): cond["If-Modified-Since"] = known["modified"]
+
+    t0 = time.monotonic()
+    r = _open(url, timeout, cond)
+    sample["status"] = r.status_code
+    sample["ttfb"] = r.elapsed.total_seconds()
+    try:
+        if r.status_code == 304 and known:
+            r.content  # drain the empty body so close() hands the connection back to the pool
+            sample["bytes"] = 0
+            if mem:
+                return mem["fp"]
+            # first poll since a restart: parse the stored copy once
+            p0 = time.perf_counter()
+            fp, _ = _parse(url, stored["body"], stored["content_type"], limit)
+            sample["parse"] = time.perf_counter() - p0
+            _parsed[url] = {"etag": stored["etag"], "modified": stored["modified"], "limit": stored["limit"], "fp": fp}
+            return fp
+
+        ctype = r.headers.get("Content-Type", "")
+        etag, modified = r.headers.get("ETag"), r.headers.get("Last-Modified")
+        sp = StreamParser(limit) if STREAM_PARSE and limit else None
+
+        def sink(chunk):
+            # parse time while streaming = time spent inside the parser
+            p0 = time.perf_counter()
+            done = sp.feed_bytes(chunk)
+            sample["parse"] += time.perf_counter() - p0
+            return done
+
+        body, stopped = _read(r, url, t0, timeout, sink if sp else None)
+        sample["bytes"] = len(body)
+    finally:
+        r.close()
+
+    p0 = time.perf_counter()
+    if sp and sp.is_feed:
+        if not stopped:
+            sp.close()
+        fp, got = sp.result(), (limit if stopped else None)
+    else:
+        fp, got = _parse(url, body, ctype)
+    sample["parse"] += time.perf_counter() - p0
+
+    if etag or modified:
+        _parsed[url] = {"etag": etag, "modified": modified, "limit": got, "fp": fp}
+        _save_state(url, etag, modified, ctype, body, got)
+    else:
+        _parsed.pop(url, None)
+    return fp
+
+def fetch_all(urls, fetch_one, deadline=None):
+    """
+    Run fetch_one(url) for every url on the shared pool and wait at most
+    `deadline` seconds for the batch. Returns [(url, result)] in input order
+    for the feeds that finished in time; failures and stragglers are logged
+    and left out.
+    """
+    if not urls:
+        return []
+    deadline = deadline or FEED_DEADLINE
+    futs = {u: _executor().submit(fetch_one, u) for u in urls}
+    done, pending = wait(futs.values(), timeout=deadline)
+
+    out = []
+    for u, f in futs.items():
+        if f not in done:
+            # queued ones are dropped; running ones end at their own timeout
+            # (and record their own sample)
+            if f.cancel():
+                feed_stats.record(u, error=f"skipped: queued past the {deadline:.1f}s deadline")
+            log.warning("feed skipped, missed %.1fs deadline: %s", deadline, u)
+            continue
+        try:
+            out.append((u, f.result()))
+        except Exception as e:
+            log.warning("feed failed: %s (%s)", u, e)
+    return out
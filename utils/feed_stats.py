@@ -0,0 +1,153 @@
+# utils/feed_stats.py
+# Per-feed fetch telemetry. Every fetch leaves one sample (DNS, connect,
+# TTFB and total time, bytes, HTTP status, entries, parse time, error); the
+# last WINDOW samples per feed are kept in sqlite so fetches from every worker
+# show up on /admin/feeds/.
+import math, time, socket, sqlite3, logging, threading
+from contextlib import contextmanager
+import urllib3.util.connection as u3conn
+
+log = logging.getLogger(__name__)
+
+WINDOW = 100   # samples kept per feed
+DB = None      # sqlite file; app.py points it at the feed state db
+
+_FIELDS = ("status", "dns", "connect", "ttfb", "total", "bytes", "entries", "parse", "error")
+
+_tls = threading.local()
+_ready = False
+
+def configure(db=None, window=None):
+    global DB, WINDOW
+    if db: DB = str(db)
+    if window: WINDOW = int(window)
+
+# --- DNS/connect timing ---
+# requests/urllib3 don't report these, so the socket factory urllib3 calls for
+# new connections is wrapped: when the current thread is timing a fetch, the
+# name is resolved here (timed) and the resolved address handed on (timed).
+# TLS still verifies against the hostname. Other threads pass straight through.
+
+_create_connection = u3conn.create_connection
+
+def _timed_create_connection(address, *args, **kwargs):
+    sample = getattr(_tls, "sample", None)
+    if sample is None:
+        return _create_connection(address, *args, **kwargs)
+    host, port = address
+    t0 = time.perf_counter()
+    infos = socket.getaddrinfo(host, port, u3conn.allowed_gai_family(), socket.SOCK_STREAM)
+    t1 = time.perf_counter()
+    sample["dns"] = t1 - t0
+    err = OSError(f"getaddrinfo returned nothing for {host}")
+    for *_, sockaddr in infos:
+        try:
+            sock = _create_connection((sockaddr[0], port), *args, **kwargs)
+        except OSError as e:
+            err = e
+            continue
+        sample["connect"] = time.perf_counter() - t1
+        return sock
+    raise err
+
+u3conn.create_connection = _timed_create_connection
+
+# --- samples ---
+
+@contextmanager
+def timed(url):
+    """
+    Time one fetch of `url`. The caller fills in status/ttfb/bytes/entries/
+    parse on the yielded dict; total and any exception are added here and the
+    sample is stored on exit (the exception still propagates).
+    """
+    sample = dict.fromkeys(_FIELDS)
+    sample["parse"] = 0.0
+    _tls.sample = sample
+    t0 = time.perf_counter()
+    try:
+        yield sample
+    except Exception as e:
+        sample["error"] = f"{type(e).__name__}: {e}"[:500]
+        resp = getattr(e, "response", None)  # requests.HTTPError carries the status
+        if resp is not None:
+            sample["status"] = resp.status_code
+        raise
+    finally:
+        _tls.sample = None
+        sample["total"] = time.perf_counter() - t0
+        record(url, **sample)
+
+def _conn():
+    global _ready
+    con = sqlite3.connect(DB, timeout=5)
+    if not _ready:
+        con.execute("""CREATE TABLE IF NOT EXISTS feed_fetch (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT, at REAL, status INTEGER,
+            dns REAL, connect REAL, ttfb REAL, total REAL, bytes INTEGER,
+            entries INTEGER, parse REAL, error TEXT)""")
+        con.execute("CREATE INDEX IF NOT EXISTS ix_feed_fetch_url_id ON feed_fetch (url, id)")
+        _ready = True
+    return con
+
+def record(url, **sample):
+    if not DB:
+        return
+    try:
+        con = _conn()
+        try:
+            with con:
+                con.execute(f"INSERT INTO feed_fetch (url, at, {', '.join(_FIELDS)}) VALUES (?, ?{', ?' * len(_FIELDS)})",
+                            (url, time.time(), *(sample.get(f) for f in _FIELDS)))
+                # rolling window: drop this feed's samples older than the last WINDOW
+                con.execute("DELETE FROM feed_fetch WHERE url = ? AND id <= "
+                            "(SELECT id FROM feed_fetch WHERE url = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                            (url, url, WINDOW))
+        finally:
+            con.close()
+    except sqlite3.Error as e:
+        log.warning("feed stats write failed: %s", e)
+
+def _pct(values, p):
+    # nearest-rank percentile
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+def summary(url):
+    """Rolled-up window for one feed (None if it has no samples yet)."""
+    if not DB:
+        return None
+    try:
+        con = _conn()
+        try:
+            con.row_factory = sqlite3.Row
+            rows = con.execute("SELECT * FROM feed_fetch WHERE url = ? ORDER BY id", (url,)).fetchall()
+        finally:
+            con.close()
+    except sqlite3.Error as e:
+        log.warning("feed stats read failed: %s", e)
+        return None
+    if not rows:
+        return None
+    last = rows[-1]
+    ok = [r for r in rows if not r["error"]]
+    errors = [r for r in rows if r["error"]]
+    col = lambda name: [r[name] for r in ok]
+    return {
+        "samples": len(rows),
+        "failures": len(errors),
+        "failing": bool(last["error"]),
+        "last_at": last["at"],
+        "last_status": last["status"],
+        "last_bytes": last["bytes"],
+        "last_entries": last["entries"],
+        "last_ok_at": ok[-1]["at"] if ok else None,
+        "last_error": errors[-1]["error"] if errors else None,
+        "last_error_at": errors[-1]["at"] if errors else None,
+        "total_p50": _pct(col("total"), 50), "total_p95": _pct(col("total"), 95),
+        "ttfb_p50": _pct(col("ttfb"), 50), "ttfb_p95": _pct(col("ttfb"), 95),
+        "dns_p50": _pct(col("dns"), 50), "connect_p50": _pct(col("connect"), 50),
+        "parse_p50": _pct(col("parse"), 50), "parse_p95": _pct(col("parse"), 95),
+    }
@@ -0,0 +1,151 @@
+# utils/feed_stream.py
+from lxml import etree
+from feedparser import FeedParserDict
+# feedparser's own date and HTML sanitizing helpers, so entries come out the
+# same as from feedparser.parse()
+from feedparser.datetimes import _parse_date
+from feedparser.sanitizer import _sanitize_html
+
+MEDIA_NS = ("http://search.yahoo.com/mrss/", "http://search.yahoo.com/mrss")
+
+_ENTRY_TAGS = {"item", "entry"}
+_FEED_TAGS = {"channel", "feed", "RDF"}
+
+def _split(tag):
+    # "{ns}local" -> (ns, local); comments/PIs have non-str tags
+    if not isinstance(tag, str):
+        return "", ""
+    if tag.startswith("{"):
+        ns, local = tag[1:].split("}", 1)
+        return ns, local
+    return "", tag
+
+def _text(el):
+    return "".join(el.itertext()).strip()
+
+def _inner_html(el):
+    # escaped/CDATA HTML arrives as text; Atom type="xhtml" as child elements
+    if len(el):
+        parts = [el.text or ""] + [etree.tostring(c, encoding="unicode", with_tail=True) for c in el]
+        return "".join(parts).strip()
+    return (el.text or "").strip()
+
+def _clean(html):
+    return _sanitize_html(html, "utf-8", "text/html") if html else html
+
+def _media(entry, el, local):
+    url = el.get("url")
+    if not url:
+        return
+    if local == "content":
+        entry.setdefault("media_content", []).append(FeedParserDict(url=url, type=el.get("type", ""), medium=el.get("medium", "")))
+    elif local == "thumbnail":
+        entry.setdefault("media_thumbnail", []).append(FeedParserDict(url=url))
+
+def _link(entry, rel, href, type_, length):
+    # FeedParserDict derives entry.enclosures from the rel="enclosure" links
+    if "links" not in entry:
+        entry["links"] = []
+    entry["links"].append(FeedParserDict(rel=rel, href=href, type=type_, length=length))
+
+def _entry(el):
+    d = FeedParserDict()
+    for ch in el:
+        ns, local = _split(ch.tag)
+        if ns in MEDIA_NS:
+            if local == "group":
+                for g in ch:
+                    _media(d, g, _split(g.tag)[1])
+            else:
+                _media(d, ch, local)
+        elif local == "title":
+            d["title"] = _text(ch)
+        elif local == "link":
+            href = ch.get("href")
+            rel = ch.get("rel", "alternate")
+            if href is None:
+                d.setdefault("link", _text(ch))
+            else:
+                _link(d, rel, href, ch.get("type", ""), ch.get("length"))
+                if rel == "alternate":
+                    d.setdefault("link", href)
+        elif local in ("guid", "id"):
+            d["id"] = _text(ch)
+        elif local in ("pubDate", "published", "issued", "date"):
+            d.setdefault("published", _text(ch))
+        elif local in ("updated", "modified"):
+            d["updated"] = _text(ch)
+        elif local in ("description", "summary"):
+            d["summary"] = _clean(_inner_html(ch))
+            d["summary_detail"] = FeedParserDict(value=d["summary"], type="text/html")
+        elif local in ("encoded", "content"):
+            d["content"] = [FeedParserDict(value=_clean(_inner_html(ch)), type="text/html")]
+        elif local == "enclosure" and ch.get("url"):
+            _link(d, "enclosure", ch.get("url"), ch.get("type", ""), ch.get("length"))
+        elif local == "source":
+            d["source"] = FeedParserDict(title=_text(ch), href=ch.get("url", ""))
+        elif local in ("author", "creator"):
+            d.setdefault("author", _text(ch))
+    for key in ("published", "updated"):
+        if d.get(key):
+            d[key + "_parsed"] = _parse_date(d[key])
+    if "summary" not in d and d.get("content"):
+        d["summary"] = d["content"][0]["value"]
+    return d
+
+class StreamParser:
+    """
+    Incremental RSS/Atom parser: feed_bytes() it the body chunk by chunk;
+    it returns True once `limit` entries are collected so the caller can stop
+    downloading. result() gives a feedparser-shaped {"feed", "entries"} dict.
+    """
+
+    def __init__(self, limit=None):
+        self.limit = limit
+        self.feed = FeedParserDict()
+        self.entries = []
+        self.is_feed = False    # saw an <rss>/<feed>/<rdf:RDF> root
+        self._p = etree.XMLPullParser(events=("start", "end"), recover=True,
+                                      resolve_entities=False, no_network=True)
+        self._depth = 0         # >0 while inside an entry
+
+    def feed_bytes(self, chunk):
+        self._p.feed(chunk)
+        return self._drain()
+
+    def close(self):
+        try:
+            self._p.close()
+        except etree.XMLSyntaxError:
+            pass
+        self._drain()
+
+    def _drain(self):
+        if self.limit and len(self.entries) >= self.limit:
+            return True
+        for ev, el in self._p.read_events():
+            local = _split(el.tag)[1]
+            if ev == "start":
+                if local in ("rss", "feed", "RDF"):
+                    self.is_feed = True
+                if local in _ENTRY_TAGS:
+                    self._depth += 1
+                continue
+            if local in _ENTRY_TAGS:
+                self._depth -= 1
+                self.entries.append(_entry(el))
+                # drop parsed entries so memory stays flat on huge feeds
+                el.clear()
+                parent = el.getparent()
+                while parent is not None and el.getprevious() is not None:
+                    del parent[0]
+                if self.limit and len(self.entries) >= self.limit:
+                    return True
+            elif local == "title" and not self._depth and "title" not in self.feed:
+                parent = el.getparent()
+                if parent is not None and _split(parent.tag)[1] in _FEED_TAGS:
+                    self.feed["title"] = _text(el)
+        return False
+
+    def result(self):
+        return FeedParserDict(feed=self.feed, entries=self.entries, bozo=0)
@@ -0,0 +1,156 @@
+# utils/feeds.py
+# The one feed pipeline: fetch (utils/feed_fetch) -> normalize each entry
+# into a FeedEntry (memoized, utils/entry_cache) -> dedup -> newest first,
+# cached through utils/cache.swr_get.
+import re, hashlib, bleach
+from html import unescape
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from zoneinfo import ZoneInfo
+from dateutil import parser as dtparse
+from utils.feed_fetch import parse_feed, fetch_all
+from utils.cache import swr_get
+from utils.entry_cache import normalized
+from utils import img_proxy
+
+TZ = ZoneInfo("America/Indiana/Indianapolis")
+EXCERPT_CHARS = 280
+
+_IMG_RE = re.compile(r'<img[^>]+src=["\']([^"\']+)["\']', re.I)
+_WS_RE = re.compile(r"\s+")
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid", "cmpid")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+@dataclass(slots=True, frozen=True)
+class FeedEntry:
+    title: str
+    link: str
+    key: str                   # link_key(link); dedup key and NewsItem.link_hash
+    img: str | None = None
+    when: datetime | None = None  # aware, America/Indiana/Indianapolis
+    source: str | None = None
+    summary: str | None = None    # plain-text excerpt
+    also: tuple = ()              # (source, link) of the same story elsewhere; see utils/near_dup
+
+def link_key(link):
+    """
+    Stable id for a story URL: sha1 of the link with case-insensitive
+    scheme/host, no fragment, no tracking params and no trailing slash.
+    """
+    u = urlsplit(link.strip())
+    query = urlencode([(k, v) for k, v in parse_qsl(u.query, keep_blank_values=True)
+                       if not k.lower().startswith(_TRACKING_PARAMS)])
+    path = u.path.rstrip("/") or "/"
+    norm = urlunsplit((u.scheme.lower(), u.netloc.lower(), path, query, ""))
+    return hashlib.sha1(norm.encode("utf-8")).hexdigest()
+
+def excerpt(html: str | None, max_chars: int = EXCERPT_CHARS) -> str | None:
+    if not html:
+        return None
+    # strip all tags -> plain text
+    txt = bleach.clean(html, tags=[], attributes={}, protocols=[], strip=True)
+    # collapse whitespace
+    txt = _WS_RE.sub(" ", unescape(txt)).strip()
+    # cap length with a word-boundary ellipsis
+    if len(txt) > max_chars:
+        cut = txt[:max_chars].rstrip()
+        # try not to cut mid-word
+        cut = cut.rsplit(" ", 1)[0] if " " in cut else cut
+        txt = cut + "…"
+    return txt or None
+
+def _image(entry):
+    # 1) media:content / media:thumbnail
+    for key in ("media_content", "media_thumbnail"):
+        m = entry.get(key) or []
+        if isinstance(m, list) and m and m[0].get("url"):
+            return m[0]["url"]
+    # 2) image enclosure
+    for e in entry.get("enclosures") or []:
+        if e.get("href") and str(e.get("type", "")).startswith("image/"):
+            return e["href"]
+    # 3) first <img> in content/summary
+    for html in ((entry.get("content") or [{}])[0].get("value"),
+                 (entry.get("summary_detail") or {}).get("value"),
+                 entry.get("summary")):
+        if html:
+            m = _IMG_RE.search(html)
+            if m:
+                return m.group(1)
+    return None
+
+def _when(entry):
+    # feedparser (and StreamParser) already parsed the date to UTC struct_time
+    for key in ("published_parsed", "updated_parsed"):
+        st = entry.get(key)
+        if st:
+            return datetime(*st[:6], tzinfo=timezone.utc).astimezone(TZ)
+    raw = entry.get("published") or entry.get("updated")
+    if not raw:
+        return None
+    try:
+        dt = dtparse.parse(raw)
+    except (ValueError, OverflowError):
+        return None
+    return (dt if dt.tzinfo else dt.replace(tzinfo=TZ)).astimezone(TZ)
+
+def _source(entry, feed_title):
+    # the entry's own <source>, else the feed title, else the link's host
+    src = entry.get("source") or {}
+    title = (src.get("title") or feed_title or "").strip()
+    return title or urlsplit(entry.get("link") or "").hostname or "Feed"
+
+def _entry(e, feed_title):
+    link = (e.get("link") or "").strip()
+    return FeedEntry(
+        title=unescape(e.get("title") or "").strip(),
+        link=link,
+        key=link_key(link),
+        img=_image(e),
+        when=_when(e),
+        source=_source(e, feed_title),
+        summary=excerpt(e.get("summary")),
+    )
+
+def feed_entries(url, limit, timeout=None):
+    """Fetch and normalize one feed (entries without a title or link are dropped)."""
+    fp = parse_feed(url, timeout, limit=limit)
+    feed_title = (fp.get("feed") or {}).get("title")
+    out = []
+    for e in (fp.entries or [])[:limit]:
+        if not (e.get("title") or "").strip() or not (e.get("link") or "").strip():
+            continue
+        # unchanged entries reuse last refresh's record (no bleach/regex/date parsing)
+        out.append(normalized("feed", e, lambda e: _entry(e, feed_title), feed_title))
+    img_proxy.note_feed([url], [it.img for it in out if it.img])  # hosts /img-proxy/ may fetch from
+    return out
+
+def dedup(entries):
+    # one record per story link; the newest copy wins
+    by_key = {}
+    for it in entries:
+        cur = by_key.get(it.key)
+        if cur is None or (it.when or _EPOCH) > (cur.when or _EPOCH):
+            by_key[it.key] = it
+    return list(by_key.values())
+
+def _load(urls, per_feed_limit, timeout, deadline):
+    items = []
+    for _url, entries in fetch_all(urls, lambda u: feed_entries(u, per_feed_limit, timeout), deadline):
+        items.extend(entries)
+    items = dedup(items)
+    items.sort(key=lambda x: x.when or _EPOCH, reverse=True)
+    return items
+
+def fetch_entries(urls, per_feed_limit=20, limit=40, ttl=300, timeout=None, deadline=None):
+    """
+    Newest-first, deduplicated FeedEntry list from all `urls`. Feeds are
+    fetched concurrently; one slower than `timeout` or still running at
+    `deadline` is skipped and the rest are merged. ttl=0 bypasses the cache.
+    """
+    urls = [u for u in urls if u]
+    if not urls:
+        return []
+    key = f"feeds::{','.join(urls)}::{per_feed_limit}"
+    return swr_get(key, lambda: _load(urls, per_feed_limit, timeout, deadline), ttl)[:limit]
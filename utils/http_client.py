@@ -0,0 +1,60 @@
+# utils/http_client.py
+# One pooled, keep-alive HTTP client for every outbound call (feeds, calendar,
+# Turnstile), so repeat requests to the same few hosts reuse their TCP/TLS
+# connections instead of handshaking every time.
+import threading, requests
+from http.cookiejar import DefaultCookiePolicy
+from requests.adapters import HTTPAdapter
+
+UA = "NewsNowIndy/1.0 (+https://newsnowindy.com)"
+
+# Defaults; app.py overrides them from Config via configure().
+CONNECT_TIMEOUT = 3.0
+READ_TIMEOUT = 10.0
+POOL_HOSTS = 32     # hosts with a pool of their own
+POOL_SIZE = 10      # kept-alive connections per host
+
+_session = None
+_lock = threading.Lock()
+
+def configure(user_agent=None, connect_timeout=None, read_timeout=None, pool_size=None):
+    global UA, CONNECT_TIMEOUT, READ_TIMEOUT, POOL_SIZE, _session
+    if user_agent: UA = user_agent
+    if connect_timeout: CONNECT_TIMEOUT = float(connect_timeout)
+    if read_timeout: READ_TIMEOUT = float(read_timeout)
+    if pool_size: POOL_SIZE = int(pool_size)
+    with _lock:
+        _session = None  # rebuilt with the new settings on next use
+
+def session():
+    """The shared requests.Session (thread-safe for concurrent requests)."""
+    global _session
+    with _lock:
+        if _session is None:
+            s = requests.Session()
+            # no retries: callers have their own deadlines and the feed circuit breaker
+            adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_SIZE, max_retries=0)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            s.headers.update({"User-Agent": UA, "Accept-Encoding": "gzip, deflate"})
+            # shared by unrelated callers: never carry cookies from one to another
+            s.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            _session = s
+        return _session
+
+def request(method, url, timeout=None, **kwargs):
+    """
+    session().request() with the default (connect, read) timeouts. A single
+    number caps the read timeout; connecting never waits past CONNECT_TIMEOUT.
+    """
+    if timeout is None:
+        timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+    elif not isinstance(timeout, tuple):
+        timeout = (min(CONNECT_TIMEOUT, timeout), timeout)
+    return session().request(method, url, timeout=timeout, **kwargs)
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
@@ -0,0 +1,189 @@
+# utils/images.py
+# Resized variants of hero images (thumbnail, card, full width), each as WebP
+# plus a JPEG (PNG when the image has transparency) fallback, and the
+# srcset/<picture> helpers the templates use to pick between them.
+#
+# Uploads are stored under a hash of their bytes (<sha256[:32]>.<ext>), so the
+# same file uploaded twice is kept once. Variants live in HERO_IMAGE_DIR/v/
+# next to a small JSON manifest per image.
+# Images without a manifest (remote URLs, SVG/GIF, no Pillow, not processed
+# yet) are rendered as a plain <img> of the original.
+import re, json, hashlib, logging, mimetypes, threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from markupsafe import Markup, escape
+from utils.article_render import image_size, PROBE_BYTES
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional dependency: without it heroes are served as uploaded
+    Image = None
+
+log = logging.getLogger(__name__)
+
+SIZES = {"thumb": 320, "card": 640, "full": 1600}  # name -> max width (never upscaled)
+URL_PREFIX = "/static/img/"
+VARIANT_DIR = "v"
+SKIP_EXTS = {".svg", ".gif"}  # vector / possibly animated: keep the original
+HASH_CHARS = 32
+_STORED_RE = re.compile(rf"^[0-9a-f]{{{HASH_CHARS}}}\.[a-z0-9]+$")
+
+# Defaults; app.py overrides them from Config via configure().
+IMG_DIR = None
+QUALITY = 80
+ASYNC = False
+
+_manifests = {}  # {url: manifest} (found ones only; a missing manifest is looked for again)
+_pool = None
+_lock = threading.Lock()
+
+def configure(img_dir, quality=None, async_=None):
+    global IMG_DIR, QUALITY, ASYNC
+    IMG_DIR = str(img_dir)
+    if quality: QUALITY = int(quality)
+    if async_ is not None: ASYNC = bool(async_)
+
+def available():
+    return Image is not None
+
+def content_name(data, ext):
+    ext = ".jpg" if ext.lower() == ".jpeg" else ext.lower()
+    return hashlib.sha256(data).hexdigest()[:HASH_CHARS] + ext
+
+def is_stored_name(name):
+    return bool(_STORED_RE.match(name))
+
+def store(data, ext):
+    """Save image bytes in IMG_DIR under their content hash. Returns (path, created)."""
+    path = Path(IMG_DIR) / content_name(data, ext)
+    if path.exists():
+        return path, False
+    tmp = path.with_name(path.name + ".part")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+    return path, True
+
+def describe(path):
+    """The image index fields of a stored file: key, url, mime, width, height, bytes."""
+    path = Path(path)
+    with open(path, "rb") as f:
+        size = image_size(f.read(PROBE_BYTES))
+    return {
+        "key": path.stem,
+        "url": URL_PREFIX + path.name,
+        "mime": mimetypes.guess_type(path.name)[0] or "application/octet-stream",
+        "width": size[0] if size else None,
+        "height": size[1] if size else None,
+        "bytes": path.stat().st_size,
+    }
+
+def _base(name):
+    return name.replace(".", "_")
+
+def _manifest_path(name):
+    return Path(IMG_DIR) / VARIANT_DIR / f"{_base(name)}.json"
+
+def _save_opts(fmt):
+    if fmt == "webp":
+        return {"quality": QUALITY, "method": 4}
+    if fmt == "jpg":
+        return {"quality": QUALITY, "optimize": True, "progressive": True}
+    return {"optimize": True}
+
+def make_variants(path):
+    """Write the variants and manifest of one image in IMG_DIR. Returns the manifest, or None if skipped."""
+    path = Path(path)
+    if Image is None or path.suffix.lower() in SKIP_EXTS:
+        return None
+    out = Path(IMG_DIR) / VARIANT_DIR
+    out.mkdir(parents=True, exist_ok=True)
+    with Image.open(path) as im:
+        im = ImageOps.exif_transpose(im)
+        alpha = im.mode in ("RGBA", "LA") or (im.mode == "P" and "transparency" in im.info)
+        im = im.convert("RGBA" if alpha else "RGB")
+        fallback = "png" if alpha else "jpg"
+        w, h = im.size
+        variants, widths = {}, set()
+        for size, max_w in SIZES.items():
+            vw = min(w, max_w)
+            if vw in widths:  # small original: the larger sizes would be the same file
+                continue
+            widths.add(vw)
+            vh = max(1, round(h * vw / w))
+            v = im if vw == w else im.resize((vw, vh), Image.LANCZOS)
+            files = {}
+            for fmt in ("webp", fallback):
+                name = f"{_base(path.name)}-{size}.{fmt}"
+                v.save(out / name, **_save_opts(fmt))
+                files[fmt] = f"{URL_PREFIX}{VARIANT_DIR}/{name}"
+            variants[size] = {"w": vw, "h": vh, **files}
+
+    manifest = {"src": URL_PREFIX + path.name, "w": w, "h": h, "fallback": fallback, "variants": variants}
+    tmp = _manifest_path(path.name).with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest))
+    tmp.replace(_manifest_path(path.name))
+    _manifests[manifest["src"]] = manifest
+    return manifest
+
+def _run(path, on_done=None):
+    try:
+        m = make_variants(path)
+        if m and on_done:
+            on_done(m)
+    except Exception:
+        log.exception("image variants failed: %s", path)
+
+def process(path, on_done=None):
+    """
+    Make the variants for a new upload, here or on the background worker
+    (HERO_VARIANTS_ASYNC). on_done(manifest) runs on the worker once they exist.
+    """
+    global _pool
+    if Image is None:
+        return
+    if not ASYNC:
+        return _run(path)
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-variants")
+    _pool.submit(_run, path, on_done)
+
+def manifest(url):
+    if not url or IMG_DIR is None or not url.startswith(URL_PREFIX):
+        return None
+    m = _manifests.get(url)
+    if m is None:
+        try:
+            m = json.loads(_manifest_path(url[len(URL_PREFIX):]).read_text())
+        except (OSError, ValueError):
+            return None
+        _manifests[url] = m
+    return m
+
+def srcset(url, fmt="webp"):
+    """"a-thumb.webp 320w, a-card.webp 640w, ..." for an image's variants ('' without any)."""
+    m = manifest(url)
+    if not m:
+        return ""
+    fmt = m["fallback"] if fmt == "fallback" else fmt
+    return ", ".join(f"{v[fmt]} {v['w']}w" for v in m["variants"].values() if fmt in v)
+
+def _attrs(attrs):
+    return "".join(f' {k.rstrip("_").replace("_", "-")}="{escape(v)}"' for k, v in attrs.items() if v is not None)
+
+def picture(url, size="card", sizes="100vw", alt="", **attrs):
+    """
+    <picture> with WebP and fallback srcsets for a hero image; `size` picks
+    the src for browsers without srcset. Extra keyword args become <img>
+    attributes (class_="x" -> class="x").
+    """
+    m = manifest(url)
+    if not m:
+        return Markup(f'<img src="{escape(url)}" alt="{escape(alt)}"{_attrs(attrs)}>')
+    vs = m["variants"]
+    v = vs.get(size) or list(vs.values())[-1]
+    fb = m["fallback"]
+    return Markup(
+        f'<picture><source type="image/webp" srcset="{escape(srcset(url))}" sizes="{escape(sizes)}">'
+        f'<img src="{escape(v[fb])}" srcset="{escape(srcset(url, fb))}" sizes="{escape(sizes)}" '
+        f'width="{v["w"]}" height="{v["h"]}" alt="{escape(alt)}"{_attrs(attrs)}></picture>')
@@ -0,0 +1,281 @@
+# utils/img_proxy.py
+# /img-proxy/<signed-key>: feed card images fetched once from the publisher,
+# shrunk to thumbnail width and kept in a disk cache (LRU, capped in bytes),
+# then served with year-long cache headers.
+#
+# Keys are the image URL signed with SECRET_KEY, so only URLs the app itself
+# rewrote can be requested. On top of that the image's host must be one seen
+# in our configured feeds (feed hosts and the image hosts their entries use;
+# see note_feed()), and must not resolve to a private address. Redirects are
+# followed here, one hop at a time, and every hop is checked again and
+# connected to the address that was checked.
+import os, time, socket, hashlib, ipaddress, logging, threading
+from collections import OrderedDict
+from io import BytesIO
+from pathlib import Path
+from urllib.parse import urlsplit, urljoin
+import certifi, urllib3
+from itsdangerous import URLSafeSerializer, BadSignature
+from utils import http_client
+import utils.cache as feed_cache
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional: without it card images keep linking to the publisher
+    Image = None
+
+log = logging.getLogger(__name__)
+
+# Defaults; app.py overrides them from Config via configure().
+ENABLED = True
+CACHE_DIR = None
+MAX_BYTES = 256 * 1024 * 1024   # disk cache cap
+WIDTH = 400                     # thumbnail width (never upscaled)
+MAX_SOURCE = 8 * 1024 * 1024    # largest upstream image fetched
+QUALITY = 75
+HOSTS_TTL = 30 * 86400          # a host not seen in any feed for this long is dropped
+FAIL_TTL = 600                  # a failed fetch isn't retried for this long
+MAX_REDIRECTS = 3
+ALLOW_PRIVATE = False
+
+_signer = None
+_hosts = {"t": 0.0, "hosts": {}}  # in-process copy of the shared host list
+_failed = {}                      # {url: retry after}
+_index = None                     # OrderedDict {file name: bytes}, least recently used first
+_bytes = 0
+_lock = threading.Lock()
+_fetch_locks = {}
+
+class ProxyError(Exception):
+    def __init__(self, status, msg):
+        super().__init__(msg)
+        self.status = status
+
+def configure(secret, cache_dir, max_bytes=None, width=None, max_source=None, enabled=None):
+    global _signer, CACHE_DIR, MAX_BYTES, WIDTH, MAX_SOURCE, ENABLED, _index
+    _signer = URLSafeSerializer(secret, salt="img-proxy")
+    CACHE_DIR = str(cache_dir)
+    Path(CACHE_DIR).mkdir(parents=True, exist_ok=True)
+    if max_bytes: MAX_BYTES = int(max_bytes)
+    if width: WIDTH = int(width)
+    if max_source: MAX_SOURCE = int(max_source)
+    if enabled is not None: ENABLED = bool(enabled)
+    _index = None
+
+# --- allowed hosts ---
+
+def _allowed_hosts():
+    if time.time() - _hosts["t"] > 60:
+        _hosts["hosts"] = feed_cache.cache.get("imgproxy::hosts") or {}
+        _hosts["t"] = time.time()
+    return _hosts["hosts"]
+
+def note_feed(feed_urls, img_urls=()):
+    """Record the hosts of configured feeds and of the images in their entries."""
+    seen = {urlsplit(u).hostname for u in (*feed_urls, *img_urls) if u}
+    seen.discard(None)
+    hosts, now = _allowed_hosts(), time.time()
+    stale = {h for h in seen if now - hosts.get(h, 0) > 86400}  # refresh a host at most daily
+    if not stale:
+        return
+    hosts = {h: t for h, t in (feed_cache.cache.get("imgproxy::hosts") or {}).items() if now - t < HOSTS_TTL}
+    hosts.update(dict.fromkeys(stale, now))
+    feed_cache.cache.set("imgproxy::hosts", hosts, HOSTS_TTL)
+    _hosts.update(t=now, hosts=hosts)
+
+def allowed(url):
+    u = urlsplit(url or "")
+    return u.scheme in ("http", "https") and u.hostname in _allowed_hosts()
+
+def proxied(url, endpoint_path):
+    """The proxy URL for a feed image (endpoint_path + signed key), or the URL itself if it can't be proxied."""
+    if not ENABLED or Image is None or _signer is None or not allowed(url):
+        return url
+    return endpoint_path + _signer.dumps(url)
+
+# --- disk cache ---
+
+def _load_index():
+    global _index, _bytes
+    files = sorted((f for f in os.scandir(CACHE_DIR) if f.is_file() and not f.name.endswith(".part")),
+                   key=lambda f: f.stat().st_mtime)
+    _index = OrderedDict((f.name, f.stat().st_size) for f in files)
+    _bytes = sum(_index.values())
+
+def _cached(name):
+    with _lock:
+        if _index is None:
+            _load_index()
+        if name not in _index:
+            return None
+        _index.move_to_end(name)
+    path = Path(CACHE_DIR) / name
+    try:
+        os.utime(path)  # recency for the other workers' next index load
+    except FileNotFoundError:  # evicted by another worker
+        with _lock:
+            _forget(name)
+        return None
+    return path
+
+def _forget(name):
+    global _bytes
+    _bytes -= _index.pop(name, 0)
+
+def _put(name, data):
+    global _bytes
+    path = Path(CACHE_DIR) / name
+    tmp = path.with_name(name + ".part")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+    with _lock:
+        if _index is None:
+            _load_index()
+        _forget(name)
+        _index[name] = len(data)
+        _bytes += len(data)
+        while _bytes > MAX_BYTES and len(_index) > 1:
+            old = next(iter(_index))
+            _forget(old)
+            try:
+                os.remove(Path(CACHE_DIR) / old)
+            except FileNotFoundError:
+                pass
+    return path
+
+def cache_info():
+    with _lock:
+        if _index is None:
+            _load_index()
+        return {"files": len(_index), "bytes": _bytes, "max_bytes": MAX_BYTES}
+
+# --- fetch + thumbnail ---
+
+def _is_public(addr):
+    return ipaddress.ip_address(addr.split("%")[0]).is_global
+
+def _address(host, port):
+    """The address to connect to for host, or None if any of its addresses is private."""
+    try:
+        addrs = [ai[4][0] for ai in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)]
+    except OSError:
+        return None
+    if not addrs:
+        return None
+    if not ALLOW_PRIVATE and not all(_is_public(a) for a in addrs):
+        return None
+    return addrs[0]
+
+def _open(url):
+    # Not through http_client: its pool resolves the host again when it
+    # connects, which could give a different (private) address than the one
+    # checked. This connects to the checked address itself, and still sends
+    # the host name for the Host header, SNI and the certificate check.
+    u = urlsplit(url)
+    https = u.scheme == "https"
+    port = u.port or (443 if https else 80)
+    addr = _address(u.hostname, port)
+    if addr is None:
+        raise ProxyError(403, "private address")
+    opts = {"timeout": urllib3.Timeout(connect=http_client.CONNECT_TIMEOUT, read=8), "retries": False, "maxsize": 1}
+    if https:
+        pool = urllib3.HTTPSConnectionPool(addr, port, server_hostname=u.hostname, assert_hostname=u.hostname,
+                                           cert_reqs="CERT_REQUIRED", ca_certs=certifi.where(), **opts)
+    else:
+        pool = urllib3.HTTPConnectionPool(addr, port, **opts)
+    path = (u.path or "/") + (f"?{u.query}" if u.query else "")
+    headers = {"Host": u.netloc.rpartition("@")[2], "User-Agent": http_client.UA, "Accept": "image/*"}
+    try:
+        return pool, pool.urlopen("GET", path, headers=headers, redirect=False, preload_content=False)
+    except Exception:
+        pool.close()
+        raise
+
+def _download(url):
+    for _ in range(MAX_REDIRECTS + 1):
+        if not allowed(url):
+            raise ProxyError(403, "host not in configured feeds")
+        pool, r = _open(url)
+        try:
+            if r.status in (301, 302, 303, 307, 308) and r.headers.get("Location"):
+                url = urljoin(url, r.headers["Location"])
+                continue
+            if r.status != 200:
+                raise ProxyError(502, f"upstream status {r.status}")
+            ctype = r.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if not ctype.startswith("image/") or ctype == "image/svg+xml":
+                raise ProxyError(502, f"not a raster image: {ctype or 'no content type'}")
+            data = bytearray()
+            for chunk in r.stream(64 * 1024):
+                data += chunk
+                if len(data) > MAX_SOURCE:
+                    raise ProxyError(502, "image too large")
+            return bytes(data), ctype
+        finally:
+            r.release_conn()
+            pool.close()
+    raise ProxyError(502, "too many redirects")
+
+def _thumbnail(data, ctype):
+    if Image is None:
+        return data, ctype
+    with Image.open(BytesIO(data)) as im:
+        if im.width * im.height > 50_000_000:
+            raise ProxyError(502, "image too large")
+        im = ImageOps.exif_transpose(im)
+        if im.width > WIDTH:
+            im = im.resize((WIDTH, max(1, round(im.height * WIDTH / im.width))), Image.LANCZOS)
+        im = im.convert("RGBA" if im.mode in ("RGBA", "LA", "P") else "RGB")
+        out = BytesIO()
+        im.save(out, "WEBP", quality=QUALITY, method=4)
+    return out.getvalue(), "image/webp"
+
+_EXT = {"image/webp": ".webp", "image/jpeg": ".jpg", "image/png": ".png", "image/gif": ".gif", "image/avif": ".avif"}
+_MIME = {v: k for k, v in _EXT.items()}
+
+def get(key):
+    """(path, mimetype) of the cached thumbnail for a signed key, fetching it on first use."""
+    if not ENABLED or _signer is None:
+        raise ProxyError(404, "proxy disabled")
+    try:
+        url = _signer.loads(key)
+    except BadSignature:
+        raise ProxyError(404, "bad signature")
+    if not allowed(url):
+        raise ProxyError(403, "host not in configured feeds")
+
+    stem = hashlib.sha1(url.encode()).hexdigest()
+    for ext, mime in _MIME.items():
+        path = _cached(stem + ext)
+        if path:
+            return path, mime
+
+    with _lock:
+        lk = _fetch_locks.setdefault(stem, threading.Lock())
+    try:
+        with lk:  # one upstream fetch per image, however many requests arrive at once
+            for ext, mime in _MIME.items():
+                path = _cached(stem + ext)
+                if path:
+                    return path, mime
+            return _fetch(url, stem)
+    finally:
+        with _lock:
+            _fetch_locks.pop(stem, None)
+
+def _fetch(url, stem):
+    if _failed.get(url, 0) > time.time():
+        raise ProxyError(502, "recently failed")
+    try:
+        data, ctype = _thumbnail(*_download(url))
+        if ctype not in _EXT:
+            raise ProxyError(502, f"unsupported image type: {ctype}")
+    except Exception as e:
+        if len(_failed) > 1000:
+            _failed.clear()
+        _failed[url] = time.time() + FAIL_TTL
+        if isinstance(e, ProxyError):
+            raise
+        log.info("img proxy fetch failed for %s: %s", url, e)
+        raise ProxyError(502, "fetch failed")
+    return _put(stem + _EXT[ctype], data), ctype
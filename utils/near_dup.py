@@ -0,0 +1,115 @@
+# utils/near_dup.py
+# Groups the same story told by different outlets (different headline, link
+# and source) into one card. MinHash signatures over the headline + lead
+# words, banded into an LSH index, so each item only meets the few items that
+# share a band with it instead of every other item.
+import re, hashlib, random
+from dataclasses import replace
+from utils.cache import LRUCache
+
+NUM_PERM = 32         # MinHash size
+BANDS, ROWS = 16, 2   # BANDS * ROWS == NUM_PERM; catches pairs from ~0.25 Jaccard up
+THRESHOLD = 0.4       # token-set Jaccard at which two items are the same story
+MAX_HOURS = 48        # same words further apart than this are different stories
+LEAD_WORDS = 30       # summary words used besides the headline
+
+_MASK = (1 << 61) - 1  # Mersenne prime modulus
+_rng = random.Random(0x5eed)  # fixed so signatures are stable across workers
+_PERMS = [(_rng.randrange(1, _MASK), _rng.randrange(0, _MASK)) for _ in range(NUM_PERM)]
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOP = frozenset("""
+a an and are as at be been but by for from has have he her his in into is it its
+of on or says said she that the their they this to was were will with after over
+new news man woman police indy indianapolis impd update updates video watch
+""".split())
+
+# (title, summary) -> (tokens, signature); the same stories come back every refresh
+_memo = LRUCache(max_entries=4096, max_bytes=None)
+
+def _stem(w):
+    # crude suffix folding so "homicides"/"homicide" and "killed"/"kills" match
+    for suf in ("ings", "ing", "ies", "ed", "es", "s"):
+        if len(w) > len(suf) + 3 and w.endswith(suf):
+            return w[: -len(suf)]
+    return w
+
+def tokens(title, summary=None):
+    words = _WORD_RE.findall((title or "").lower())
+    words += _WORD_RE.findall((summary or "").lower())[:LEAD_WORDS]
+    return frozenset(_stem(w) for w in words if len(w) > 2 and w not in _STOP)
+
+def _hash(tok):
+    return int.from_bytes(hashlib.blake2b(tok.encode(), digest_size=8).digest(), "big")
+
+def signature(toks):
+    hs = [_hash(t) for t in toks] or [0]
+    return tuple(min((a * h + b) % _MASK for h in hs) for a, b in _PERMS)
+
+def _sig(it):
+    key = (it.title, it.summary)
+    out = _memo.get(key)
+    if out is None:
+        toks = tokens(it.title, it.summary)
+        out = (toks, signature(toks))
+        _memo.set(key, out)
+    return out
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+def _close_in_time(a, b):
+    return not (a.when and b.when) or abs((a.when - b.when).total_seconds()) <= MAX_HOURS * 3600
+
+def cluster(entries, threshold=THRESHOLD):
+    """
+    Collapse near-duplicate FeedEntry items. Input order is kept (pass it
+    newest first); the first item of each group is the card and carries the
+    other copies in `.also` as (source, link) pairs. threshold <= 0 turns
+    grouping off.
+    """
+    if threshold <= 0:
+        return list(entries)
+    buckets = {}  # (band, rows of the signature) -> [group index]
+    groups = []   # [lead, [token sets of every copy], [members]]
+    for it in entries:
+        toks, sig = _sig(it)
+        if not toks:
+            groups.append([it, [], []])
+            continue
+        bands = [(i, sig[i * ROWS:(i + 1) * ROWS]) for i in range(BANDS)]
+        seen, home = set(), None
+        for band in bands:
+            for gi in buckets.get(band, ()):
+                if gi in seen:
+                    continue
+                seen.add(gi)
+                lead, group_toks, _members = groups[gi]
+                if _close_in_time(it, lead) and any(jaccard(toks, t) >= threshold for t in group_toks):
+                    home = gi
+                    break
+            if home is not None:
+                break
+        if home is None:
+            home = len(groups)
+            groups.append([it, [toks], []])
+        else:
+            groups[home][1].append(toks)
+            groups[home][2].append(it)
+        for band in bands:
+            lst = buckets.setdefault(band, [])
+            if not lst or lst[-1] != home:
+                lst.append(home)
+
+    out = []
+    for lead, _toks, members in groups:
+        if members:
+            also, srcs = [], {lead.source}
+            for m in members:
+                # one link per outlet is enough on the card
+                if m.source not in srcs:
+                    srcs.add(m.source)
+                    also.append((m.source, m.link))
+            lead = replace(lead, also=tuple(also))
+        out.append(lead)
+    return out
@@ -0,0 +1,97 @@
+# utils/page_cache.py
+# Whole-response cache for the public pages. Anonymous GETs are answered from
+# the shared cache (utils.cache) as stored gzip bodies with ETag/Last-Modified,
+# and revalidations get a 304 without touching the database or templates.
+#
+# Each page is tagged (e.g. "home", "articles", "post:<slug>"); a tag's
+# generation is part of every key filed under it, so invalidate("post:x")
+# drops that page and all of its query-string variants at once. Only the
+# query args a view declares go into the key; any others (utm_*, fbclid, ...)
+# get the same cached page instead of a new entry each.
+import gzip, hashlib, time, secrets
+from functools import wraps
+from flask import request, session, current_app
+import utils.cache as feed_cache
+
+# Defaults; app.py overrides them from Config via configure().
+TTL = 300           # seconds a rendered page is kept
+GZIP_LEVEL = 6
+ENABLED = True
+
+_stats = {"hits": 0, "misses": 0, "not_modified": 0, "bypass": 0}
+
+def configure(ttl=None, enabled=None):
+    global TTL, ENABLED
+    if ttl is not None: TTL = int(ttl)
+    if enabled is not None: ENABLED = bool(enabled)
+
+def _gen(tag):
+    g = feed_cache.cache.get(f"page::gen::{tag}")
+    if g is None:
+        g = secrets.token_hex(4)
+        feed_cache.cache.set(f"page::gen::{tag}", g)
+    return g
+
+def invalidate(*tags):
+    """Drop every cached page filed under any of these tags."""
+    for tag in tags:
+        feed_cache.cache.set(f"page::gen::{tag}", secrets.token_hex(4))
+
+def _key(tags, args):
+    query = "&".join(f"{k}={v}" for k in args for v in request.args.getlist(k))
+    gens = ",".join(f"{t}={_gen(t)}" for t in tags)
+    return f"page::{request.path}?{query}::{gens}"
+
+def _cacheable():
+    # anything in the session (admin login, pending flashes) makes the page personal
+    return ENABLED and request.method == "GET" and not session
+
+def _respond(ent):
+    gz = "gzip" in request.accept_encodings
+    resp = current_app.response_class(ent["body"] if gz else gzip.decompress(ent["body"]),
+                                      mimetype=ent["mimetype"])
+    if gz:
+        resp.headers["Content-Encoding"] = "gzip"
+    resp.set_etag(ent["etag"] + ("-gz" if gz else ""))
+    resp.last_modified = ent["at"]
+    resp.headers["Cache-Control"] = "public, no-cache"  # keep it, but revalidate each time
+    resp.vary.update(("Accept-Encoding", "Cookie"))
+    resp = resp.make_conditional(request)
+    if resp.status_code == 304:
+        _stats["not_modified"] += 1
+    return resp
+
+def cached_page(tags, ttl=None, args=()):
+    """
+    Cache a view's response for anonymous GETs. `tags` maps the view's kwargs
+    to the tags to file the page under, e.g. lambda slug: [f"post:{slug}"].
+    `args` names the query args the view reads, e.g. ("before",); the rest
+    are left out of the key.
+    Only 200s are stored, and only if rendering left the session empty.
+    """
+    def deco(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            if not _cacheable():
+                _stats["bypass"] += 1
+                return view(**kwargs)
+            key = _key(tags(**kwargs), args)
+            ent = feed_cache.cache.get(key)
+            if ent is not None:
+                _stats["hits"] += 1
+                return _respond(ent)
+
+            _stats["misses"] += 1
+            resp = current_app.make_response(view(**kwargs))
+            if resp.status_code != 200 or resp.direct_passthrough or session or "Set-Cookie" in resp.headers:
+                return resp
+            body = resp.get_data()
+            ent = {"body": gzip.compress(body, GZIP_LEVEL), "etag": hashlib.sha1(body).hexdigest(),
+                   "mimetype": resp.mimetype, "at": int(time.time())}
+            feed_cache.cache.set(key, ent, ttl or TTL)
+            return _respond(ent)
+        return wrapper
+    return deco
+
+def stats():
+    return dict(_stats)
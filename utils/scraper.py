@@ -1,15 +1,156 @@
 # utils/scraper.py
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, timedelta
 from urllib.parse import urlencode, urljoin
-import requests
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
+from utils import http_client
 
 BASE = "https://calendar.indy.gov/"
 
+# Event "cards/rows" in the grid: anything whose class mentions event (the old
+# '.event, .Event, .calendar-event, .fc-event, .list-event, [class*="event"]').
+# Adjust these selectors to match the actual markup if needed.
+_CANDIDATES = etree.XPath("//*[contains(@class, 'event') or contains(@class, 'Event')]")
+
+def _cls(*names):
+    # XPath for "has one of these class tokens" (what a CSS .name selector means)
+    return " or ".join(f"contains(concat(' ', normalize-space(@class), ' '), ' {n} ')" for n in names)
+
+_TITLE = etree.XPath(f"(.//*[{_cls('title', 'event-title')}] | .//a | .//h3 | .//h4)[1]")
+_LINK = etree.XPath("(.//a[contains(@href, 'event') or contains(@href, 'Event')])[1]")
+_WHEN = etree.XPath(f"(.//*[{_cls('time', 'event-time', 'date', 'datetime')}])[1]")
+_LOCATION = etree.XPath(f"(.//*[{_cls('location', 'event-location', 'venue')}])[1]")
+
+# Date/time recognition, compiled once. Covers what the strptime formats did
+# ("Mon, Sep 23, 6:30 PM", "Monday, September 23, 6:30 PM", "Sep 23, 2025 6:30 PM",
+# "09/23/2025 6:30 PM", "2025-09-23 18:30") and finds the date anywhere in the text.
+_MONTHS = {m: i for i, m in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), 1)}
+_TIME = r"(?P<h>\d{1,2}):(?P<mi>\d{2})\s*(?P<ap>[ap])\.?m\.?"
+_DATE_RES = (
+    re.compile(r"(?:(?:mon|tue|wed|thu|fri|sat|sun)[a-z]*\.?,?\s+)?(?P<mon>[a-z]{3})[a-z]*\.?\s+(?P<day>\d{1,2}),?"
+               r"(?:\s+(?P<year>\d{4}),?)?\s+(?:at\s+)?" + _TIME, re.I),
+    re.compile(r"(?P<mo>\d{1,2})/(?P<day>\d{1,2})/(?P<year>\d{4})\s+" + _TIME, re.I),
+    re.compile(r"(?P<year>\d{4})-(?P<mo>\d{2})-(?P<day>\d{2})[ T](?P<h>\d{2}):(?P<mi>\d{2})"),
+)
+_TIME_RE = re.compile(_TIME, re.I)
+
 def _week_start(iso_year: int, iso_week: int) -> date:
     return date.fromisocalendar(iso_year, iso_week, 1)  # Monday
 
+def _hour(m):
+    h = int(m["h"])
+    ap = (m.groupdict().get("ap") or "").lower()
+    if ap == "p" and h != 12:
+        h += 12
+    elif ap == "a" and h == 12:
+        h = 0
+    return h
+
+def _near_year(month, day, near: date):
+    # "Mon, Sep 23" has no year: take the one that lands closest to the week asked for
+    best = None
+    for y in (near.year - 1, near.year, near.year + 1):
+        try:
+            d = date(y, month, day)
+        except ValueError:
+            continue
+        if best is None or abs(d - near) < abs(best - near):
+            best = d
+    return best
+
+def _match_dt(m, near: date):
+    g = m.groupdict()
+    month = _MONTHS.get(g["mon"].lower()) if g.get("mon") else int(g["mo"])
+    if not month or int(m["mi"]) > 59 or _hour(m) > 23:
+        return None
+    try:
+        d = date(int(g["year"]), month, int(g["day"])) if g.get("year") else _near_year(month, int(g["day"]), near)
+    except ValueError:
+        return None
+    return datetime(d.year, d.month, d.day, _hour(m), int(m["mi"])) if d else None
+
+def _find_dt(text, near: date):
+    # first recognizable date+time in text -> (datetime, end offset)
+    for rx in _DATE_RES:
+        for m in rx.finditer(text):
+            dt = _match_dt(m, near)
+            if dt:
+                return dt, m.end()
+    return None, 0
+
+def parse_when(text, near: date):
+    """
+    (start, end) naive local datetimes from a card's time text, e.g.
+    "Mon, Sep 23, 6:30 PM – 8:30 PM". end is None unless a second time follows.
+    """
+    text = re.sub(r"\s+", " ", text or "").strip()
+    start, pos = _find_dt(text, near)
+    if not start:
+        return None, None
+    rest = text[pos:]
+    end, _ = _find_dt(rest, start.date())
+    if not end:
+        # "– 8:30 PM": same day as the start
+        m = _TIME_RE.search(rest)
+        if m and int(m["mi"]) < 60 and _hour(m) < 24:
+            end = start.replace(hour=_hour(m), minute=int(m["mi"]))
+    return start, end
+
+def _text(el):
+    # children joined with a space, like get_text(" "): "<span>Tue, Sep 23</span><span>6:30 PM</span>"
+    return re.sub(r"\s+", " ", " ".join(el.itertext())).strip() if el is not None else ""
+
+def _first(el, xpath):
+    found = xpath(el)
+    return found[0] if found else None
+
+def extract_events(html, week_monday: date):
+    """Events of the week starting `week_monday` found in a grid page's HTML."""
+    doc = lxml.html.fromstring(html)
+    # candidates with a time element inside; the ones holding more than one
+    # time element are containers (grid, day columns). A card is the outermost
+    # non-container, so its nested event-* parts aren't read as events of their own.
+    timed = {}  # {candidate: its time element}, document order
+    for c in _CANDIDATES(doc):
+        when_el = _first(c, _WHEN)
+        if when_el is not None:
+            timed[c] = when_el
+    held = {c: set() for c in timed}  # {candidate: time elements of the candidates within it}
+    for c, when_el in timed.items():
+        held[c].add(when_el)
+        for anc in c.iterancestors():
+            if anc in held:
+                held[anc].add(when_el)
+    single = {c for c in timed if len(held[c]) == 1}
+    cards = [c for c in timed if c in single and not any(anc in single for anc in c.iterancestors())]
+
+    events = []
+    week_end = week_monday + timedelta(days=7)
+    for c in cards:
+        when_el = timed[c]
+        start_dt, end_dt = parse_when(_text(when_el), week_monday)
+        # Filter to week window if we got a start
+        if not start_dt or not (week_monday <= start_dt.date() < week_end):
+            continue
+
+        title_el = _first(c, _TITLE)
+        link_el = title_el if title_el is not None and title_el.tag == "a" else _first(c, _LINK)
+        href = link_el.get("href") if link_el is not None else None
+        events.append({
+            "title": _text(title_el) or "Untitled",
+            "location": _text(_first(c, _LOCATION)),
+            "start": start_dt,
+            "end": end_dt,
+            "url": urljoin(BASE, href) if href else None,
+        })
+
+    # Sort by start time
+    events.sort(key=lambda e: e["start"])
+    return events
+
 def fetch_calendar_week(iso_year: int, iso_week: int):
     """
     Returns a list of events for the given ISO week by scraping the grid view.
@@ -23,82 +164,25 @@ def fetch_calendar_week(iso_year: int, iso_week: int):
     params = {"view": "grid", "search": "y", "start": week_monday.isoformat()}
     url = BASE + "?" + urlencode(params)
 
-    headers = {
-        "User-Agent": "NewsNowIndyBot/1.0 (+https://newsnowindy.com)"
-    }
-    r = requests.get(url, headers=headers, timeout=20)
+    r = http_client.get(url, timeout=20)
     r.raise_for_status()
-    html = r.text
-    soup = BeautifulSoup(html, "lxml")
-
-    # --- Heuristics: find event “cards/rows” in the grid ---
-    # Try common structures: elements with a class containing 'event' or links to event detail pages.
-    # Adjust these selectors to match the actual markup if needed.
-    candidates = soup.select('.event, .Event, .calendar-event, .fc-event, .list-event, [class*="event"]')
+    return extract_events(r.content, week_monday)
 
-    events = []
-    week_end = week_monday + timedelta(days=7)
-
-    def parse_dt(text):
-        # Try to extract date/time from text like "Mon, Sep 23, 6:30 PM"
-        text = re.sub(r'\s+', ' ', text or '').strip()
-        for fmt in (
-            "%a, %b %d, %I:%M %p",
-            "%A, %B %d, %I:%M %p",
-            "%b %d, %Y %I:%M %p",
-            "%m/%d/%Y %I:%M %p",
-            "%Y-%m-%d %H:%M",
-        ):
-            try:
-                # Assume local Eastern time; store naive, you can localize if desired
-                return datetime.strptime(text, fmt)
-            except ValueError:
-                pass
-        return None
-
-    for c in candidates:
-        # Title
-        title_el = c.select_one('.title, .event-title, a, h3, h4')
-        title = (title_el.get_text(strip=True) if title_el else "").strip()
-
-        # Link (to event details)
-        link_el = title_el if title_el and title_el.name == "a" else c.select_one('a[href*="event"], a[href*="Event"]')
-        href = link_el.get("href") if link_el else None
-        url_abs = urljoin(BASE, href) if href else None
-
-        # Time/date text (site-specific; try a few labels/containers)
-        when_el = c.select_one('.time, .event-time, .date, .datetime')
-        when_text = (when_el.get_text(" ", strip=True) if when_el else "").strip()
-
-        # Split start/end if like "6:30 PM – 8:30 PM" or similar patterns
-        start_dt = end_dt = None
-        if "–" in when_text or "-" in when_text:
-            sep = "–" if "–" in when_text else "-"
-            parts = [p.strip() for p in when_text.split(sep, 1)]
-            if len(parts) == 2:
-                start_dt = parse_dt(parts[0])
-                end_dt = parse_dt(parts[1])
-        if not start_dt:
-            start_dt = parse_dt(when_text)
-
-        # Location
-        loc_el = c.select_one('.location, .event-location, .venue')
-        location = (loc_el.get_text(" ", strip=True) if loc_el else "").strip()
-
-        # If date is not embedded, attempt to infer from the day column around the event node (optional enhancement)
-
-        # Filter to week window if we got a start
-        if start_dt and (week_monday <= start_dt.date() < week_end):
-            events.append({
-                "title": title or "Untitled",
-                "location": location or "",
-                "start": start_dt,
-                "end": end_dt,
-                "url": url_abs
-            })
-
-    # As a fallback, if nothing matched, you can relax selectors or parse table rows by weekday headers.
-
-    # Sort by start time
-    events.sort(key=lambda e: e["start"] or datetime.min)
-    return events
+def fetch_calendar_weeks(weeks, workers=4):
+    """
+    fetch_calendar_week() for several (iso_year, iso_week) pairs at once.
+    Returns {(iso_year, iso_week): events}; a week whose fetch fails maps to
+    the exception instead, so one bad page doesn't lose the others.
+    """
+    weeks = list(weeks)
+    if not weeks:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(workers, len(weeks)), thread_name_prefix="calendar-scrape") as pool:
+        futs = {wk: pool.submit(fetch_calendar_week, *wk) for wk in weeks}
+    out = {}
+    for wk, f in futs.items():
+        try:
+            out[wk] = f.result()
+        except Exception as e:
+            out[wk] = e
+    return out
@@ -0,0 +1,126 @@
+# utils/search.py
+# Site search over published posts and stored news items, backed by an
+# inverted index in the main database:
+#   - SQLite: an FTS5 table (porter-stemmed, ranked with bm25)
+#   - Postgres/CockroachDB: a tsvector column with a GIN/inverted index (ts_rank)
+# Both hold one row per document, keyed by doc_id = id * 2 (+1 for news), so
+# a re-save replaces exactly one row and a lookup only touches the postings
+# of the query's terms.
+import re, bleach
+from html import unescape
+from sqlalchemy import text
+from models import db, Post, NewsItem
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_WS_RE = re.compile(r"\s+")
+MAX_TERMS = 8
+
+def _dialect():
+    d = db.engine.dialect.name
+    return "pg" if d in ("postgresql", "cockroachdb") else d
+
+def _plain(html):
+    txt = bleach.clean(html or "", tags=[], attributes={}, protocols=[], strip=True)
+    return _WS_RE.sub(" ", unescape(txt)).strip()
+
+def _doc_id(kind, ref_id):
+    return ref_id * 2 + (kind == "news")
+
+def ensure_index(fill=True):
+    """Create the index if it's missing, and fill it when it is new (fill=False: only create it)."""
+    d = _dialect()
+    if d == "sqlite":
+        db.session.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+            "title, body, tokenize='porter unicode61 remove_diacritics 2')"))
+        empty = db.session.execute(text("SELECT rowid FROM search_index LIMIT 1")).first() is None
+    elif d == "pg":
+        db.session.execute(text(
+            "CREATE TABLE IF NOT EXISTS search_index (doc_id BIGINT PRIMARY KEY, tsv TSVECTOR NOT NULL)"))
+        db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_search_index_tsv ON search_index USING GIN (tsv)"))
+        empty = db.session.execute(text("SELECT doc_id FROM search_index LIMIT 1")).first() is None
+    else:
+        return
+    db.session.commit()
+    if empty and fill:
+        rebuild()
+
+def _put(docs):
+    # docs: [(doc_id, title, body or None)]; None removes the document
+    d = _dialect()
+    if d not in ("sqlite", "pg") or not docs:
+        return
+    ids = [{"id": i} for i, _t, _b in docs]
+    rows = [{"id": i, "title": t, "body": b} for i, t, b in docs if b is not None]
+    if d == "sqlite":
+        db.session.execute(text("DELETE FROM search_index WHERE rowid = :id"), ids)
+        if rows:
+            db.session.execute(text("INSERT INTO search_index (rowid, title, body) VALUES (:id, :title, :body)"), rows)
+    else:
+        db.session.execute(text("DELETE FROM search_index WHERE doc_id = :id"), ids)
+        if rows:
+            db.session.execute(text(
+                "INSERT INTO search_index (doc_id, tsv) VALUES (:id, "
+                "setweight(to_tsvector('english', :title), 'A') || setweight(to_tsvector('english', :body), 'B'))"), rows)
+
+def index_posts(posts):
+    """(Re)index posts; unpublished ones are dropped. Runs in the caller's transaction."""
+    _put([(_doc_id("post", p.id), p.title,
+           " ".join(filter(None, (p.summary, _plain(p.content)))) if p.published else None) for p in posts])
+
+def remove_post(post_id):
+    _put([(_doc_id("post", post_id), None, None)])
+
+def index_news(items):
+    _put([(_doc_id("news", n.id), n.title, " ".join(filter(None, (_plain(n.summary), n.source))))
+          for n in items])
+
+def rebuild(batch=500):
+    """Index every published post and news item from scratch (flask reindex-search)."""
+    d = _dialect()
+    if d not in ("sqlite", "pg"):
+        return 0
+    db.session.execute(text("DELETE FROM search_index"))
+    n = 0
+    for model, index in ((Post, index_posts), (NewsItem, index_news)):
+        last = 0
+        while True:
+            rows = model.query.filter(model.id > last).order_by(model.id).limit(batch).all()
+            if not rows:
+                break
+            index(rows)
+            n += len(rows)
+            last = rows[-1].id
+            db.session.expire_all()
+    db.session.commit()
+    return n
+
+def _terms(q):
+    return _WORD_RE.findall((q or "").lower())[:MAX_TERMS]
+
+def search(q, page=1, size=20):
+    """
+    Ranked hits for a free-text query: ([Post or NewsItem], has_more).
+    Every term must match; the last one also matches as a prefix on SQLite.
+    """
+    terms, d = _terms(q), _dialect()
+    if not terms or d not in ("sqlite", "pg"):
+        return [], False
+    params = {"limit": size + 1, "offset": (max(page, 1) - 1) * size}
+    if d == "sqlite":
+        params["q"] = " ".join(f'"{t}"' for t in terms) + "*"
+        # bm25 column weights: a title hit counts for five body hits
+        sql = ("SELECT rowid FROM search_index WHERE search_index MATCH :q "
+               "ORDER BY bm25(search_index, 5.0, 1.0) LIMIT :limit OFFSET :offset")
+    else:
+        params["q"] = " ".join(terms)
+        sql = ("SELECT doc_id FROM search_index, plainto_tsquery('english', :q) AS q "
+               "WHERE tsv @@ q ORDER BY ts_rank(tsv, q) DESC, doc_id DESC LIMIT :limit OFFSET :offset")
+    ids = [r[0] for r in db.session.execute(text(sql), params)]
+    more, ids = len(ids) > size, ids[:size]
+
+    posts = {p.id: p for p in Post.query.filter(Post.id.in_([i // 2 for i in ids if not i % 2]),
+                                                Post.published.is_(True))}
+    news = {n.id: n for n in NewsItem.query.filter(NewsItem.id.in_([i // 2 for i in ids if i % 2]))}
+    hits = [(news if i % 2 else posts).get(i // 2) for i in ids]
+    return [h for h in hits if h is not None], more